@@ -0,0 +1,211 @@
+"""In-process stand-ins for Google Sheets (gspread) and the Telegram Bot API.
+
+`install(backend)` swaps them in for `gspread.authorize`, the service-account
+credentials and `requests.Session.post` to api.telegram.org, so the app and CLI
+run unchanged with no credentials or network. Every call can be slowed down
+(`latency`) or failed with a 429 (`rate_429`), and is counted per operation.
+"""
+import datetime
+import json
+import random
+import re
+import threading
+import time
+
+import gspread
+import requests
+from google.oauth2.service_account import Credentials
+
+OFFICERS = ["Ana", "Bobbie", "Carlos", "Jasmynne", "Jestoni", "Johnny", "Julie", "Kim"]
+MONTHS = [datetime.date(2000, m, 1).strftime("%B") for m in range(1, 13)]
+
+
+def synthetic_rows(n, month_offset=0, seed=0):
+    """A month tab with `n` member rows laid out like the real sheet (4 header rows,
+    officer in G, tries in H-I, visit date/time in J-K, RSVPs in L-S, active in T)."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    rows = [["Visitation Roster"], [""], [""],
+            ["Last", "First", "DOB", "Anniversary", "Address", "Phone", "Officer", "Try 1", "Try 2",
+             "Date", "Time", *OFFICERS, "Active", "Last Visited"]]
+    for i in range(n):
+        visit = ""
+        if rng.random() < 0.3:
+            visit = (today + datetime.timedelta(days=30 * month_offset + rng.randint(-10, 20))).strftime("%m/%d/%Y")
+        rows.append([
+            f"Last{i}", f"First{i}", "01/01/1970", "", f"{i} Main St", "555-0100",
+            rng.choice(OFFICERS) if rng.random() < 0.7 else "",
+            "TRUE" if rng.random() < 0.4 else "FALSE",
+            "TRUE" if rng.random() < 0.2 else "FALSE",
+            visit, "01:00 PM" if visit else "",
+            *("TRUE" if visit and rng.random() < 0.2 else "" for _ in OFFICERS),
+            "YES" if rng.random() < 0.9 else "NO",
+            "02/01/2026" if rng.random() < 0.3 else "",
+        ])
+    return rows
+
+
+def _col(letters):
+    col = 0
+    for ch in letters:
+        col = col * 26 + ord(ch) - 64
+    return col
+
+
+class FakeBackend:
+    """Shared state and knobs for one fake Sheets + Telegram setup."""
+
+    def __init__(self, tabs, latency=0.0, rate_429=0.0, telegram_latency=0.0, telegram_rate_429=0.0, seed=0):
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.telegram_latency = telegram_latency
+        self.telegram_rate_429 = telegram_rate_429
+        self.spreadsheet = FakeSpreadsheet(self, {title: FakeWorksheet(self, title, rows) for title, rows in tabs.items()})
+        self.sent = []
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    @classmethod
+    def synthetic(cls, rows_per_tab, month_tabs=12, archive_tabs=0, **kwargs):
+        current = datetime.date.today().month - 1
+        tabs = {"Monthly Template": synthetic_rows(0), "Roster": synthetic_rows(0)}
+        for i in range(archive_tabs):
+            tabs[f"Archive - {MONTHS[(current - 1 - i) % 12]}"] = synthetic_rows(rows_per_tab, seed=100 + i)
+        # Current month first, then the following months, like a live workbook
+        for offset in range(month_tabs):
+            tabs[MONTHS[(current + offset) % 12]] = synthetic_rows(rows_per_tab, offset, seed=offset)
+        return cls(tabs, **kwargs)
+
+    def hit(self, op, latency, rate_429):
+        """Counts the call, sleeps for the configured latency and maybe raises a 429."""
+        with self._lock:
+            self._counts[op] = self._counts.get(op, 0) + 1
+            limited = rate_429 and self._rng.random() < rate_429
+        if latency:
+            time.sleep(latency)
+        return limited
+
+    def sheets_call(self, op):
+        if self.hit(op, self.latency, self.rate_429):
+            resp = requests.Response()
+            resp.status_code = 429
+            resp._content = json.dumps({"error": {
+                "code": 429, "message": "Quota exceeded (fake)", "status": "RESOURCE_EXHAUSTED"}}).encode()
+            raise gspread.exceptions.APIError(resp)
+
+    def counts(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+class FakeWorksheet:
+    def __init__(self, backend, title, rows):
+        self.backend = backend
+        self.title = title
+        self.id = abs(hash(title))
+        self.rows = rows
+
+    def get_all_values(self, *args, **kwargs):
+        self.backend.sheets_call("get_all_values")
+        return [list(row) for row in self.rows]
+
+    def batch_get(self, ranges, *args, **kwargs):
+        self.backend.sheets_call("batch_get")
+        return [self._extract(rng) for rng in ranges]
+
+    def update_acell(self, label, value):
+        self.backend.sheets_call("update_acell")
+        self._set(label, value)
+        self.backend.spreadsheet.touch()
+
+    def batch_update(self, data, *args, **kwargs):
+        self.backend.sheets_call("batch_update")
+        for item in data:
+            self._set(item["range"], item["values"][0][0])
+        self.backend.spreadsheet.touch()
+
+    def _set(self, label, value):
+        row, col = gspread.utils.a1_to_rowcol(label)
+        while len(self.rows) < row:
+            self.rows.append([])
+        cells = self.rows[row - 1]
+        cells.extend([""] * (col - len(cells)))
+        cells[col - 1] = value
+
+    def _extract(self, rng):
+        m = re.fullmatch(r"([A-Z]+)(\d*):([A-Z]+)(\d*)", rng)
+        first, last = _col(m[1]), _col(m[3])
+        top, bottom = int(m[2] or 1), int(m[4] or len(self.rows))
+        values = [row[first - 1:last] for row in self.rows[top - 1:bottom]]
+        # Sheets drops trailing empty rows
+        while values and not any(values[-1]):
+            values.pop()
+        return values
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend, tabs):
+        self.backend = backend
+        self.tabs = tabs
+        self.touch()
+
+    def touch(self):
+        self.last_update = datetime.datetime.now(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+    def worksheets(self, *args, **kwargs):
+        self.backend.sheets_call("worksheets")
+        return list(self.tabs.values())
+
+    def worksheet(self, title):
+        self.backend.sheets_call("worksheet")
+        try:
+            return self.tabs[title]
+        except KeyError:
+            raise gspread.exceptions.WorksheetNotFound(title)
+
+    def get_lastUpdateTime(self):
+        self.backend.sheets_call("modified_time")
+        return self.last_update
+
+
+class FakeClient:
+    def __init__(self, backend):
+        self.backend = backend
+
+    def open_by_key(self, key):
+        self.backend.sheets_call("open_by_key")
+        return self.backend.spreadsheet
+
+
+class FakeTelegramResponse:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"HTTP {self.status_code}")
+
+
+def install(backend):
+    """Routes gspread and Telegram traffic in this process to `backend`."""
+    gspread.authorize = lambda creds, *args, **kwargs: FakeClient(backend)
+    Credentials.from_service_account_info = classmethod(lambda cls, info, scopes=None: object())
+    real_post = getattr(requests.Session.post, "_real", requests.Session.post)
+
+    def post(session, url, *args, **kwargs):
+        if "api.telegram.org" not in url:
+            return real_post(session, url, *args, **kwargs)
+        if backend.hit("telegram", backend.telegram_latency, backend.telegram_rate_429):
+            return FakeTelegramResponse(429, {"ok": False, "parameters": {"retry_after": 1}})
+        with backend._lock:
+            backend.sent.append(kwargs.get("json"))
+        return FakeTelegramResponse(200, {"ok": True})
+
+    post._real = real_post
+    requests.Session.post = post
+    return backend
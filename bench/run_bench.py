@@ -0,0 +1,311 @@
+"""Offline benchmark for visitation_app.py.
+
+Drives every view with Streamlit's AppTest against the fake Sheets/Telegram
+backend in fakes.py (synthetic rosters, 12 month tabs by default) and reports,
+per roster size and view:
+
+  cold_ms   first script run that reaches the view
+  warm_ms   median of the following reruns (cache hits)
+  api       Sheets calls made by the cold run, then by all warm runs
+  peak_mb   peak Python memory allocated while reaching the view from cold
+            (measured in a second, traced pass so tracing doesn't skew timings)
+
+then, on the same session, one of each write an officer can make:
+
+  run_ms      the script run that handles the click
+  deliver_ms  from the click until the background queue has sent every
+              Telegram message it produced
+  api         Sheets writes (batch_update/update_acell), then Sheets reads
+  telegram    Telegram messages sent
+
+plus the app's own time to first paint of the name picker (top of the script,
+imports included, to picker drawn, before any Sheets data is needed). The
+benchmark process has already imported streamlit, so this leaves out the cold
+import cost a fresh server pays on its first session.
+
+Usage:
+
+    python bench/run_bench.py                          # 100, 1000, 10000 rows
+    python bench/run_bench.py --sizes 500 --latency 0.05 --rate-429 0.02
+    python bench/run_bench.py --json bench_output.json
+    python bench/run_bench.py --baseline bench_output.json   # exit 1 on regressions
+
+No credentials or network access are needed.
+"""
+import argparse
+import contextlib
+import json
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Must be set before the app imports visitation_core
+CACHE_DIR = tempfile.mkdtemp(prefix="visitation-bench-")
+os.environ["VISITATION_CACHE_DIR"] = CACHE_DIR
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+from fakes import OFFICERS, FakeBackend, install
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "visitation_app.py")
+OFFICER = "Ana"
+SHEETS_OPS = {"open_by_key", "worksheets", "worksheet", "get_all_values", "batch_get", "update_acell",
+              "batch_update", "modified_time"}
+WRITE_OPS = {"update_acell", "batch_update"}
+
+
+def new_app():
+    at = AppTest.from_file(APP_PATH, default_timeout=300)
+    at.secrets["APP_PASSWORD"] = "bench"
+    at.secrets["TELEGRAM_TOKEN"] = "bench-token"
+    at.secrets["DEFAULT_CHAT_ID"] = "1"
+    at.secrets["USER_MAP"] = {name: str(100 + i) for i, name in enumerate(OFFICERS)}
+    at.secrets["google_credentials"] = {"private_key": "bench"}
+    at.session_state["authenticated"] = True
+    return at
+
+
+# (view name, function that moves the app to that view; each step builds on the last)
+VIEWS = [
+    ("name picker", lambda at: at),
+    ("my assignments", lambda at: at.selectbox[0].set_value(OFFICER)),
+    ("scheduled (month)", lambda at: at.radio[0].set_value("View Scheduled Visitations")),
+    ("scheduled (all months)", lambda at: at.toggle(key="sched_all_months").set_value(True)),
+    ("assign: bulk table", lambda at: at.radio[0].set_value("Assign officers (leadership)")),
+    ("assign: auto-assign", lambda at: at.radio(key="assign_mode").set_value("Auto-assign")),
+    ("assign: member cards", lambda at: at.radio(key="assign_mode").set_value("Member cards")),
+]
+
+
+def open_cards(at, prefix):
+    """Expands every card whose key starts with `prefix`. AppTest doesn't keep
+    expander state between runs, so this goes before each run that needs them."""
+    for expander in at.expander:
+        if expander.key and expander.key.startswith(prefix):
+            at.session_state[expander.key] = True
+    return at
+
+
+def click_in_card(at, cards, button_prefix, before_click=None):
+    """Opens the cards, then clicks the first button whose key starts with `button_prefix`."""
+    open_cards(at, cards).run()
+    open_cards(at, cards)
+    button = next(b for b in at.button if b.key and b.key.startswith(button_prefix) and not b.disabled)
+    if before_click:
+        before_click(at, button.key[len(button_prefix):])
+    return button.click()
+
+
+def log_attempt(at):
+    at.radio[0].set_value("View My Assignments").run()
+    return click_in_card(at, "mine_card_", "btn_",
+                         lambda at, row: at.selectbox(key=f"status_{row}").set_value("Try #1"))
+
+
+def assign_and_notify(at):
+    at.radio[0].set_value("Assign officers (leadership)").run()
+    at.toggle(key="unlock_top").set_value(True).run()
+    return next(b for b in at.button if b.label.startswith("📢")).click()
+
+
+# (write name, function that gets the app to the write untimed and clicks it; the next run is timed)
+WRITES = [
+    ("log attempt", log_attempt),
+    ("save schedule", lambda at: click_in_card(at, "mine_card_", "sched_btn_")),
+    ("rsvp", lambda at: click_in_card(
+        at.radio[0].set_value("View Scheduled Visitations").run(), "sched_card_", "rsvp_")),
+    ("auto-assign commit", lambda at: at.radio[0].set_value("Assign officers (leadership)").run()
+        .radio(key="assign_mode").set_value("Auto-assign").run()
+        .button(key="auto_commit").click()),
+    ("broadcast", assign_and_notify),
+]
+
+
+def sheets_calls(backend, ops=SHEETS_OPS):
+    return sum(n for op, n in backend.counts().items() if op in ops)
+
+
+def wait_for_delivery(timeout=60):
+    """Blocks until the app's notification queue has nothing left to send."""
+    path = os.path.join(CACHE_DIR, "notifications.sqlite3")
+    deadline = time.perf_counter() + timeout
+    while os.path.exists(path):
+        with contextlib.closing(sqlite3.connect(path)) as db:
+            if not db.execute("SELECT COUNT(*) FROM notifications WHERE status = 'queued'").fetchone()[0]:
+                return
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"Telegram queue not drained after {timeout}s")
+        time.sleep(0.01)
+
+
+def check(at, view):
+    errors = [e.value for e in at.exception] + [e.value for e in at.error]
+    if errors:
+        raise RuntimeError(f"{view}: {errors[0]}")
+
+
+def fresh_app(rows, args):
+    """Resets process-wide state (cached resources, on-disk snapshots) and installs a new backend."""
+    st.cache_resource.clear()
+    shutil.rmtree(CACHE_DIR, ignore_errors=True)
+    backend = install(FakeBackend.synthetic(
+        rows, month_tabs=args.tabs, archive_tabs=args.archives, latency=args.latency, rate_429=args.rate_429,
+        telegram_latency=args.telegram_latency, telegram_rate_429=args.telegram_rate_429, seed=args.seed,
+    ))
+    return backend, new_app()
+
+
+def peak_memory(rows, args):
+    """{view: peak MiB} for walking the views once from cold under tracemalloc."""
+    backend, at = fresh_app(rows, args)
+    peaks = {}
+    tracemalloc.start()
+    try:
+        for view, go in VIEWS:
+            tracemalloc.reset_peak()
+            go(at).run()
+            check(at, view)
+            peaks[view] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+
+def bench_size(rows, args):
+    backend, at = fresh_app(rows, args)
+    results = []
+    for view, go in VIEWS:
+        calls = sheets_calls(backend)
+        start = time.perf_counter()
+        go(at).run()
+        cold = time.perf_counter() - start
+        check(at, view)
+        cold_calls = sheets_calls(backend) - calls
+
+        calls = sheets_calls(backend)
+        warm = []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            at.run()
+            warm.append(time.perf_counter() - start)
+            check(at, view)
+        warm_calls = sheets_calls(backend) - calls
+
+        results.append({
+            "rows": rows, "view": view, "cold_ms": cold * 1000, "warm_ms": statistics.median(warm) * 1000,
+            "cold_calls": cold_calls, "warm_calls": warm_calls,
+        })
+
+    for name, prepare in WRITES:
+        wait_for_delivery()
+        prepare(at)
+        writes, reads = sheets_calls(backend, WRITE_OPS), sheets_calls(backend)
+        sent = len(backend.sent)
+        start = time.perf_counter()
+        at.run()
+        run = time.perf_counter() - start
+        check(at, f"write: {name}")
+        wait_for_delivery()
+        deliver = time.perf_counter() - start
+        writes, sent = sheets_calls(backend, WRITE_OPS) - writes, len(backend.sent) - sent
+        if not writes and not sent:
+            raise RuntimeError(f"write: {name}: nothing was written or sent")
+        results.append({
+            "rows": rows, "view": f"write: {name}", "run_ms": run * 1000, "deliver_ms": deliver * 1000,
+            "write_calls": writes, "read_calls": sheets_calls(backend) - reads - writes, "telegram": sent,
+        })
+
+    totals = {"rows": rows, "view": "(totals)", "calls": backend.counts(), "telegram_sent": len(backend.sent),
+              "first_paint_ms": at.session_state["first_paint_name picker"] * 1000}
+
+    for result, peak in zip(results, peak_memory(rows, args).values()):
+        result["peak_mb"] = peak
+    return results + [totals]
+
+
+def print_table(results):
+    print(f"{'rows':>6}  {'view':<24}{'cold_ms':>10}{'warm_ms':>10}{'api':>10}{'peak_mb':>10}")
+    for r in results:
+        if r["view"] == "(totals)":
+            calls = ", ".join(f"{op}={n}" for op, n in sorted(r["calls"].items()))
+            print(f"{r['rows']:>6}  first paint={r['first_paint_ms']:.1f} ms; calls: {calls}; "
+                  f"telegram sent={r['telegram_sent']}\n")
+            continue
+        if "run_ms" in r:
+            api = f"{r['write_calls']}/{r['read_calls']}"
+            print(f"{r['rows']:>6}  {r['view']:<24}{r['run_ms']:>10.0f}{'':>10}{api:>10}{'':>10}"
+                  f"  deliver_ms={r['deliver_ms']:.0f} telegram={r['telegram']}")
+            continue
+        api = f"{r['cold_calls']}/{r['warm_calls']}"
+        print(f"{r['rows']:>6}  {r['view']:<24}{r['cold_ms']:>10.0f}{r['warm_ms']:>10.0f}{api:>10}{r['peak_mb']:>10.1f}")
+
+
+def regressions(results, baseline, tolerance):
+    """Views and writes whose time, peak memory, API calls or Telegram messages
+    grew past the baseline."""
+    before = {(r["rows"], r["view"]): r for r in baseline if r["view"] != "(totals)"}
+    found = []
+    for r in results:
+        old = before.get((r["rows"], r["view"]))
+        if not old:
+            continue
+        if "run_ms" in r:
+            timed, counted = ("run_ms", "deliver_ms"), ("write_calls", "read_calls", "telegram")
+        else:
+            timed, counted = ("warm_ms", "peak_mb"), ("cold_calls", "warm_calls")
+        for metric in timed:
+            if r[metric] > old[metric] * (1 + tolerance):
+                found.append(f"{r['rows']} rows, {r['view']}: {metric} {old[metric]:.1f} -> {r[metric]:.1f}")
+        for metric in counted:
+            if r[metric] > old[metric]:
+                found.append(f"{r['rows']} rows, {r['view']}: {metric} {old[metric]} -> {r[metric]}")
+    return found
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Rows per month tab")
+    parser.add_argument("--tabs", type=int, default=12, help="Month tabs in the workbook (default: 12)")
+    parser.add_argument("--archives", type=int, default=0, help="Archive tabs in the workbook (default: 0)")
+    parser.add_argument("--runs", type=int, default=3, help="Warm reruns per view (default: 3)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every Sheets call")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fraction of Sheets calls that get a 429")
+    parser.add_argument("--telegram-latency", type=float, default=0.0)
+    parser.add_argument("--telegram-rate-429", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the fake backend's 429 injection")
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Earlier --json output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown/memory growth vs the baseline (default: 0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = []
+    try:
+        for rows in args.sizes:
+            size_results = bench_size(rows, args)
+            print_table(size_results)
+            results.extend(size_results)
+    finally:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print(f"REGRESSION  {line}")
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
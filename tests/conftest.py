@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The app modules live at the repo root and the fake backends in bench/
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [ROOT, os.path.join(ROOT, "bench")]
@@ -0,0 +1,41 @@
+"""propose_assignments: balanced loads and no repeat of last month's officer."""
+import collections
+
+from fakes import synthetic_rows
+from visitation_core import Roster, member_key, propose_assignments
+
+
+def members(*officers):
+    """Active members, one per officer given ("" for unassigned)."""
+    rows = synthetic_rows(0)
+    for i, officer in enumerate(officers):
+        rows.append([f"Last{i}", f"First{i}", "", "", "", "", officer, *[""] * 12, "YES", ""])
+    return Roster(rows).members
+
+
+def test_unassigned_members_even_out_the_loads():
+    roster = members("Ana", "Ana", "Ana", "Bobbie", "", "", "", "", "")
+    proposal = propose_assignments(roster, ["Ana", "Bobbie", "Carlos"])
+
+    assert [member.officer for member, _ in proposal] == [""] * 5
+    loads = collections.Counter(member.officer for member in roster if member.officer)
+    loads.update(officer for _, officer in proposal)
+    assert loads == {"Ana": 3, "Bobbie": 3, "Carlos": 3}
+
+
+def test_ties_go_to_the_officer_listed_first():
+    proposal = propose_assignments(members("", "", ""), ["Carlos", "Ana", "Bobbie"])
+    assert [officer for _, officer in proposal] == ["Carlos", "Ana", "Bobbie"]
+
+
+def test_last_months_officer_is_skipped():
+    roster = members("", "")
+    previous = {member_key(m.first_name, m.last_name): "ana" for m in roster}
+    proposal = propose_assignments(roster, ["Ana", "Bobbie", "Carlos"], previous)
+    assert [officer for _, officer in proposal] == ["Bobbie", "Carlos"]
+
+
+def test_repeat_allowed_when_no_other_officer():
+    roster = members("")
+    previous = {member_key(roster[0].first_name, roster[0].last_name): "ana"}
+    assert [officer for _, officer in propose_assignments(roster, ["Ana"], previous)] == ["Ana"]
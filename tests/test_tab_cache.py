@@ -0,0 +1,88 @@
+"""TabCache versioning against the fake Sheets backend in bench/fakes.py."""
+import threading
+
+import pytest
+
+from fakes import FakeBackend, FakeClient, synthetic_rows
+from visitation_core import SheetLoader, SheetsGateway, TabCache
+
+TAB, OTHER = "March", "April"
+
+
+@pytest.fixture
+def backend():
+    return FakeBackend({TAB: synthetic_rows(20, seed=1), OTHER: synthetic_rows(20, seed=2)})
+
+
+@pytest.fixture
+def cache(backend):
+    cache = TabCache(SheetLoader(SheetsGateway(FakeClient(backend), "fake")), snapshots=None)
+    cache.get(TAB)
+    cache.get(OTHER)
+    return cache
+
+
+def write(backend, tab_name, a1, value):
+    """Someone else editing the sheet: the cell changes and so does modifiedTime."""
+    backend.spreadsheet.tabs[tab_name].batch_update([{"range": a1, "values": [[value]]}])
+
+
+def test_unchanged_revalidation_keeps_version(backend, cache):
+    roster = cache.roster(TAB)
+    backend.spreadsheet.touch()
+    cache._revalidate(TAB)
+    assert cache.version(TAB) == 1
+    assert cache.roster(TAB) is roster
+
+
+def test_change_in_another_tab_keeps_version(backend, cache):
+    write(backend, OTHER, "G5", "Kim")
+    cache._revalidate(TAB)
+    cache._revalidate(OTHER)
+    assert cache.versions([TAB, OTHER]) == {TAB: 1, OTHER: 2}
+    assert cache.get(OTHER)["rows"][4][6] == "Kim"
+
+
+def test_column_change_bumps_version_without_full_fetch(backend, cache):
+    write(backend, TAB, "J6", "03/14/2026")
+    cache._revalidate(TAB)
+    assert cache.version(TAB) == 2
+    assert cache.get(TAB)["rows"][5][9] == "03/14/2026"
+    assert backend.counts()["get_all_values"] == 2  # Only the initial loads
+
+
+def test_inserted_row_forces_full_fetch(backend, cache):
+    sheet = backend.spreadsheet.tabs[TAB]
+    sheet.rows.insert(6, ["New", "Member", "", "", "", "", "Kim"])
+    backend.spreadsheet.touch()
+    cache._revalidate(TAB)
+    assert backend.counts()["get_all_values"] == 3
+    assert cache.version(TAB) == 2
+    assert cache.get(TAB)["rows"] == sheet.rows
+
+
+def test_patch_during_read_is_kept(backend, cache):
+    sheet = backend.spreadsheet.tabs[TAB]
+    read_done, release = threading.Event(), threading.Event()
+    batch_get = sheet.batch_get
+
+    def slow_batch_get(ranges, *args, **kwargs):
+        values = batch_get(ranges, *args, **kwargs)  # Read before the write below lands
+        read_done.set()
+        release.wait(5)
+        return values
+
+    sheet.batch_get = slow_batch_get
+    backend.spreadsheet.touch()
+    refresh = threading.Thread(target=cache._revalidate, args=(TAB,))
+    refresh.start()
+    assert read_done.wait(5)
+
+    write(backend, TAB, "G5", "Kim")
+    assert cache.patch(TAB, {"G5": "Kim"}) == 2
+    release.set()
+    refresh.join(5)
+
+    entry = cache.get(TAB)
+    assert entry["version"] == 2
+    assert entry["rows"][4][6] == "Kim"
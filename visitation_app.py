@@ -1,21 +1,142 @@
+import time
+
+# Taken before any other import so first paint includes import cost (streamlit,
+# visitation_core) on a cold process; later reruns find the modules loaded
+run_started = time.perf_counter()
+
 import streamlit as st
-import gspread
-from google.oauth2.service_account import Credentials
+from streamlit.errors import StreamlitInvalidLayoutContextError
+import contextlib
 import datetime
-import requests
+import functools
+import logging
+import os
+import threading
+
+from visitation_core import (
+    CACHE_DIR, MEMBER_STATUSES, SPREADSHEET_ID, ArchiveIndex, NotificationQueue,
+    SheetLoader, SheetsGateway, SnapshotStore, TabCache, TelegramDispatcher, archive_tab_names,
+    assignment_message, assignment_summary, authorize_sheets, month_tabs, pick_initial_tab,
+    metrics, preload, previous_month_tab, previous_officers, propose_assignments, schedule_message,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def cached_resource(fn):
+    """st.cache_resource that, with metrics on, also counts calls and misses
+    (a miss is a call that had to run the function body)."""
+    if not metrics.enabled:
+        return st.cache_resource(fn)
+    name = fn.__name__
+
+    @functools.wraps(fn)
+    def build(*args):
+        metrics.count(f"cache.{name}.miss")
+        with metrics.span(f"cache.{name}.build"):
+            return fn(*args)
+
+    cached = st.cache_resource(build)
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        metrics.count(f"cache.{name}.calls")
+        return cached(*args)
+    return wrapper
+
+
+def timed_fragment(fn=None, *, run_every=None):
+    """st.fragment that, with metrics on, also times every run of the fragment
+    (on its own, or as part of a full script run)."""
+    if fn is None:
+        return functools.partial(timed_fragment, run_every=run_every)
+    if not metrics.enabled:
+        return st.fragment(fn, run_every=run_every)
+    name = f"fragment.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def timed(*args, **kwargs):
+        with metrics.span(name):
+            return fn(*args, **kwargs)
+    return st.fragment(timed, run_every=run_every)
 
 # --- CONSTANTS ---
-SPREADSHEET_ID = "1i3Q9ff1yA3mTLJJS8-u8vcW3cz-B7envmThxijfyWTk"
+# Visit time choices in 30-minute steps, in standard clock order (12, then 1-11),
+# formatted to 2 digits for a cleaner look, e.g. "01:00 PM"
+TIME_OPTIONS = [
+    f"{str(hour).zfill(2)}:{minute} {period}"
+    for period in ["AM", "PM"]
+    for hour in [12] + list(range(1, 12))
+    for minute in ["00", "30"]
+]
+DEFAULT_TIME_INDEX = TIME_OPTIONS.index("01:00 PM")
+
+# --- NOTIFICATIONS ---
+@cached_resource
+def get_notification_queue():
+    dispatcher = TelegramDispatcher(st.secrets["TELEGRAM_TOKEN"])
+    return NotificationQueue(os.path.join(CACHE_DIR, "notifications.sqlite3"), dispatcher)
+
+
+def send_telegram_messages(messages):
+    """Queues [(recipient, chat_id, message), ...] for background delivery.
+
+    Returns immediately; the batch id is remembered so this session can show
+    its delivery status.
+    """
+    batch = get_notification_queue().enqueue(messages)
+    batches = st.session_state.setdefault("notify_batches", [])
+    batches.append((batch, time.time()))
+    del batches[:-5]
+    return batch
+
 
 def send_telegram_message(message, chat_id):
     """Sends a notification via your existing Telegram bot."""
-    token = st.secrets["TELEGRAM_TOKEN"] # Updated key
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    payload = {"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
+    return get_notification_queue().enqueue([(None, chat_id, message)])
+
+
+def recent_notification_batches():
+    """This session's batches worth showing: still pending or finished in the last minute."""
+    queue = get_notification_queue()
+    recent = []
+    for batch, queued_at in st.session_state.get("notify_batches", []):
+        counts, failures = queue.status(batch)
+        if counts["queued"] or time.time() - queued_at < 60:
+            recent.append((counts, failures))
+    return recent
+
+
+@timed_fragment(run_every=2)
+def show_notification_status():
+    for counts, failures in recent_notification_batches():
+        total = sum(counts.values())
+        if counts["queued"]:
+            st.info(f"📨 Telegram: {counts['sent']} of {total} sent, {counts['queued']} queued...")
+        elif counts["sent"]:
+            st.success(f"📨 Telegram: delivered to {counts['sent']} of {total} recipient(s).")
+        for recipient, error in failures:
+            st.warning(f"Could not notify {recipient}: {error}")
+
+
+def record_first_paint(screen):
+    """Time from the top of the script, imports included, to the first useful
+    screen, once per session."""
+    key = f"first_paint_{screen}"
+    if key not in st.session_state:
+        st.session_state[key] = time.perf_counter() - run_started
+        metrics.record("startup.first_paint", st.session_state[key], screen=screen)
+
+
+@contextlib.contextmanager
+def timed_script_run(screen):
+    """Records the run's total time from the top of the script, however it ends:
+    st.rerun() and st.stop() raise through here too."""
     try:
-        requests.post(url, json=payload)
-    except Exception as e:
-        st.error(f"Failed to send Telegram notification: {e}")
+        yield
+    finally:
+        metrics.record("script_run", time.perf_counter() - run_started, screen=screen)
+
 
 # 1. Page Config (Best to have this at the very top)
 st.set_page_config(page_title="Visitation App", page_icon="👤")
@@ -25,77 +146,181 @@ if "authenticated" not in st.session_state:
     st.session_state["authenticated"] = False
 
 if not st.session_state["authenticated"]:
-    st.title("🔐 Visitation App")
-    with st.form("login_form"):
-        pwd_input = st.text_input("Enter Access Code", type="password")
-        if st.form_submit_button("Login"):
-            if pwd_input == st.secrets["APP_PASSWORD"]:
-                st.session_state["authenticated"] = True
-                st.rerun()
-            else:
-                st.error("Invalid Code")
-    st.stop()
+    with timed_script_run("login"):
+        st.title("🔐 Visitation App")
+        with st.form("login_form"):
+            pwd_input = st.text_input("Enter Access Code", type="password")
+            if st.form_submit_button("Login"):
+                if pwd_input == st.secrets["APP_PASSWORD"]:
+                    st.session_state["authenticated"] = True
+                    st.rerun()
+                else:
+                    st.error("Invalid Code")
+        record_first_paint("login")
+        # Import the Google/HTTP stacks while the user types; started after the form
+        # is drawn so the import doesn't compete with it for the interpreter
+        preload()
+        st.stop()
 
 
 # --- 2. DATA FETCHING ---
-@st.cache_resource
-def get_sheet_client():
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets",
-        "https://www.googleapis.com/auth/drive"
-    ]
-
-    # Load the dictionary from secrets
+@cached_resource
+def get_sheets_gateway():
+    # Load the dictionary from secrets; the gateway authorizes on its first request
     creds_info = dict(st.secrets["google_credentials"])
+    return SheetsGateway(lambda: authorize_sheets(creds_info), SPREADSHEET_ID)
 
-    # Ensure the private key handles newlines correctly regardless of TOML format
-    if "private_key" in creds_info:
-        creds_info["private_key"] = creds_info["private_key"].replace("\\n", "\n")
+@cached_resource
+def get_tab_names():
+    # Serve the last known tab list straight away and re-list worksheets in the background
+    gateway = get_sheets_gateway()
+    store = get_snapshot_store()
+    snapshot = store.load_tab_names()
+    if snapshot is not None:
+        tab_names = snapshot
+        threading.Thread(target=_refresh_tab_names, args=(gateway, store, tab_names), daemon=True).start()
+        return tab_names
+    return _refresh_tab_names(gateway, store, [])
+
+def _refresh_tab_names(gateway, store, tab_names):
+    try:
+        fresh = list(gateway.worksheets())
+    except Exception:
+        if not tab_names:
+            raise
+        logger.warning("Could not refresh the tab list; using the snapshot", exc_info=True)
+        return tab_names
+    tab_names[:] = fresh  # Updated in place so the cached list picks it up
+    store.save_tab_names(fresh)
+    return tab_names
 
-    creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
-    return gspread.authorize(creds)
+@cached_resource
+def get_snapshot_store():
+    return SnapshotStore(os.path.join(CACHE_DIR, "snapshots.sqlite3"))
 
-@st.cache_resource
-def get_tab_names():
-    client = get_sheet_client()
-    spreadsheet = client.open_by_key(SPREADSHEET_ID)
-    return [sh.title for sh in spreadsheet.worksheets()]
 
-@st.cache_data(ttl=600)
-def get_sheet_data(tab_name):
-    # Use the helper function to get an authorized client
-    client = get_sheet_client()
+@cached_resource
+def get_tab_cache():
+    return TabCache(SheetLoader(get_sheets_gateway()), get_snapshot_store(), ttl=60, full_ttl=1800)
+
 
-    # Open the specific spreadsheet and worksheet
-    spreadsheet = client.open_by_key(SPREADSHEET_ID)
-    sheet = spreadsheet.worksheet(tab_name)
+def update_cells(tab_name, cells):
+    """Writes {"J12": "03/01/2026", "K12": "01:00 PM", ...} in a single batch_update
+    request and patches the same cells into the cached tab (write-through).
 
-    return sheet.get_all_values()
+    Returns False, after showing the error, if Sheets rejected the write or
+    could not be reached; the cache is left as it was."""
+    if not cells:
+        return True
+    import gspread
+    import requests
+
+    try:
+        get_sheets_gateway().batch_update(
+            tab_name, [{"range": a1, "values": [[value]]} for a1, value in cells.items()]
+        )
+    except (gspread.exceptions.APIError, requests.ConnectionError, requests.Timeout) as e:
+        logger.warning("Write to the %s tab failed", tab_name, exc_info=True)
+        st.error(f"Could not update the spreadsheet, please try again: {e}")
+        return False
+    version = get_tab_cache().patch(tab_name, cells)
+    # This session's own write isn't news to it (see watch_for_updates), unless
+    # someone else's change landed first and hasn't been shown yet
+    seen = st.session_state.get("seen_versions", {})
+    if version is not None and seen.get(tab_name) == version - 1:
+        seen[tab_name] = version
+    return True
+
+# --- ROSTER ---
+def get_roster(tab_name):
+    roster = get_tab_cache().roster(tab_name)
+    remember_version(tab_name, roster.version)
+    return roster
+
+
+def remember_version(tab_name, version):
+    """Notes the version of a tab this run is rendering; the first one rendered
+    in a run wins, so nothing newer is marked as seen before it is on screen."""
+    st.session_state.setdefault("seen_versions", {}).setdefault(tab_name, version)
+
+# --- VISIT HISTORY (ARCHIVE TABS) ---
+@cached_resource
+def get_archive_index():
+    return ArchiveIndex(os.path.join(CACHE_DIR, "archive_history.sqlite3"))
+
+
+def get_visit_history(member):
+    """History for one member from the archive index, building it on first use."""
+    index = get_archive_index()
+    archive_tabs = archive_tab_names(get_tab_names())
+    if not index.indexed_tabs().issuperset(archive_tabs):
+        with st.spinner("Indexing archive tabs (first time only)..."):
+            for tab_name, error in index.ensure(archive_tabs, get_sheets_gateway()).items():
+                st.warning(f"Could not index the {tab_name} tab: {error}")
+    return index.history(member.first_name, member.last_name, archive_tabs)
+
+
+def get_previous_officers(tab_name):
+    """{member key: officer} for last month's tab. An archive tab is read from the
+    archive index (downloaded once, never revalidated); a live month tab from the
+    tab cache."""
+    if tab_name not in archive_tab_names(get_tab_names()):
+        return previous_officers(get_roster(tab_name))
+    index = get_archive_index()
+    if tab_name not in index.indexed_tabs():
+        with st.spinner(f"Indexing the {tab_name} tab (first time only)..."):
+            error = index.ensure([tab_name], get_sheets_gateway()).get(tab_name)
+        if error:
+            raise error
+    return index.officers(tab_name)
+
+
+def render_visit_history(member, key):
+    history_box = st.expander("🕘 Visit History", key=key, on_change="rerun")
+    if not history_box.open:
+        return
+    with history_box:
+        history = get_visit_history(member)
+        if not history:
+            st.caption("No visits found in the archive tabs.")
+            return
+        st.dataframe(
+            [
+                {
+                    "Month": entry["tab"],
+                    "Officer": entry["officer"] or "Unassigned",
+                    "Attempts": f"{entry['attempts']} of 2",
+                    "Visit": f"{entry['visit_date']} {entry['visit_time']}".strip(),
+                    "Last Visited": entry["last_visited"],
+                }
+                for entry in history
+            ],
+            hide_index=True,
+            width="stretch",
+        )
 
 # --- INITIAL LOAD ---
-available_tabs = get_tab_names()
-hidden_tabs = ["Monthly Template", "Roster"]
-# Filter out hidden tabs AND any tab that starts with "Archive"
-month_list = [t for t in available_tabs if t not in hidden_tabs and not t.startswith("Archive")]
-
-# Determine the safe starting tab
-now = datetime.datetime.now()
-current_month = now.strftime("%B")            # e.g., "February"
-next_month = (now.replace(day=28) + datetime.timedelta(days=4)).strftime("%B") # e.g., "March"
-
-if current_month in month_list:
-    initial_tab = current_month
-elif next_month in month_list:
-    initial_tab = next_month
-else:
-    # Fallback to the first non-hidden, non-archived tab
-    initial_tab = month_list[0] if month_list else None
-
-if not initial_tab:
-    st.error("No active month tabs found! Please ensure your month tab (e.g., 'March') is not named 'Archive'.")
-    st.stop()
-
-all_rows = get_sheet_data(initial_tab)
+# Nothing is read from Sheets until a name is picked; while the picker is up,
+# the tab list and starting month load in the background.
+def _warm_up(gateway, store, cache):
+    with metrics.span("startup.warm_up"):
+        try:
+            tab_names = store.load_tab_names() or list(gateway.worksheets())
+            initial_tab = pick_initial_tab(month_tabs(tab_names))
+            if initial_tab:
+                cache.roster(initial_tab)
+        except Exception:
+            logger.warning("Start-up warm-up failed; data will load on demand", exc_info=True)
+
+
+@cached_resource
+def start_warm_up():
+    thread = threading.Thread(
+        target=_warm_up, args=(get_sheets_gateway(), get_snapshot_store(), get_tab_cache()),
+        name="warm-up", daemon=True,
+    )
+    thread.start()
+    return thread
 
 # (Names list logic follows...)
 
@@ -110,384 +335,668 @@ names = [
     "Kim"
 ]
 
-# --- 3. MAIN UI ---
-st.title("📋 Visitation App")
+# --- LIST CONTROLS ---
+PAGE_SIZE = 10
+
+
+def member_filter_controls(key):
+    """Renders the search box and status filter; returns (query, statuses)."""
+    col_search, col_status = st.columns([2, 1])
+    with col_search:
+        query = st.text_input("Search name or officer", key=f"filter_search_{key}")
+    with col_status:
+        wanted = st.multiselect("Status", MEMBER_STATUSES, key=f"filter_status_{key}")
+    return query, wanted
+
+
+def apply_member_filter(roster, members, query, wanted):
+    matches = roster.search(query)
+    return [
+        member for member in members
+        if (matches is None or member.row_number in matches) and (not wanted or member.status in wanted)
+    ]
+
+
+def filter_members(roster, members, key):
+    """Search box and status filter for a member list; returns the matching members."""
+    query, wanted = member_filter_controls(key)
+    return apply_member_filter(roster, members, query, wanted)
 
-user_name = st.selectbox("Who is viewing?", options=["-- Select Name --"] + names)
 
-if user_name != "-- Select Name --":
-    # --- ADMIN NOTIFICATION (RESTORED) ---
-    # Only notify if the user is NOT you and hasn't been notified this session
-    if user_name != "Carlos" and f"notified_{user_name}" not in st.session_state:
-        admin_id = st.secrets["DEFAULT_CHAT_ID"]
-        send_telegram_message(f"🚀 **App Activity:** {user_name} has logged into the Visitation Portal.", admin_id)
-        st.session_state[f"notified_{user_name}"] = True
+def paginate(items, key, page_size=PAGE_SIZE):
+    """Returns the selected page of `items`, so only that slice creates widgets."""
+    if len(items) <= page_size:
+        return items
+    num_pages = -(-len(items) // page_size)
+    # Page count in the key: a new filter result starts back on page 1
+    page = st.pagination(num_pages, key=f"page_{key}_{num_pages}")
+    start = (page - 1) * page_size
+    st.caption(f"Showing {start + 1}-{min(start + page_size, len(items))} of {len(items)}")
+    return items[start:start + page_size]
 
-    # 1. Dynamic Month Selector
-    # Use initial_tab to set the default index
+
+# --- CARD RENDERERS ---
+# Each card is a fragment: a widget change inside one card reruns just that card
+# instead of the whole script. Cards look their member up by row number so a
+# fragment rerun always shows the latest cached data, and start collapsed so
+# only the cards someone opens build their widgets.
+
+def rerun_card():
+    """Reruns just the current card after a write, or the whole page if the click
+    arrived on a full script run rather than a fragment rerun."""
     try:
-        default_idx = month_list.index(initial_tab)
-    except ValueError:
-        default_idx = 0
+        st.rerun(scope="fragment")
+    except StreamlitInvalidLayoutContextError:
+        st.rerun()
+
+
+@timed_fragment
+def render_assignment_card(tab_name, row_number):
+    """One card in "View My Assignments"; its widgets rerun only this card."""
+    member = get_roster(tab_name).by_row.get(row_number)
+    if member is None:
+        return
+
+    # Corrected Mapping (First Last)
+    full_name = member.full_name
+
+    dob = member.dob or "N/A"
+    anniversary = member.anniversary or "N/A"
+    last_visited = member.last_visited or None
+    address_for_map = member.address
+    phone = member.phone or "N/A"
+
+    # Check Attempt Status
+    try_1 = member.try_1
+    try_2 = member.try_2
+
+    # Collapsed by default: a closed card runs none of its widgets
+    card = st.expander(f"👤 {full_name}  ·  {member.status}", key=f"mine_card_{tab_name}_{row_number}",
+                       on_change="rerun")
+    if not card.open:
+        return
+
+    with card:
+        # 1. Dates
+        st.markdown(f"🎂 **DOB:** {dob}    💍 **Married:** {anniversary}")
+
+        # Display Last Visited only if it exists
+        if last_visited:
+            st.info(f"🕒 **Last Visited:** {last_visited}")
+
+        # 2. Action Buttons (Phone & Maps)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"📞 [{phone}](tel:{phone.replace('-', '').replace(' ', '')})")
+        with col2:
+            if address_for_map:
+                map_search_url = f"https://www.google.com/maps/search/?api=1&query={address_for_map.replace(' ', '+')}"
+                st.link_button("🗺️ Open Maps", map_search_url, use_container_width=True)
+            else:
+                st.button("No Address Found", disabled=True, use_container_width=True)
+
+        # 3. Progress Display
+        st.write("---")
+        if try_1 and try_2:
+            st.success("✅ **Goal Reached:** 2 of 2 attempts completed.")
+        elif try_1:
+            st.info("🟡 **Progress:** 1 of 2 attempts completed.")
+        else:
+            st.warning("⚪ **Not Started:** 0 attempts completed.")
+
+        # 4. Log Visit Section
+        with st.expander("📝 Log a Visitation Attempt"):
+            attempt_choice = st.selectbox(
+                "Which attempt did you complete?",
+                options=["-- Select --", "Try #1", "Try #2"],
+                key=f"status_{row_number}"
+            )
+
+            if st.button(f"Confirm attempt for {full_name}", key=f"btn_{row_number}"):
+                if attempt_choice == "-- Select --":
+                    st.warning("Please select an attempt number.")
+                else:
+                    col_to_update = "H" if attempt_choice == "Try #1" else "I"
+
+                    with st.spinner("Updating spreadsheet..."):
+                        if update_cells(tab_name, {f"{col_to_update}{row_number}": "TRUE"}):
+                            st.success("Updated!")
+                            rerun_card()
+        # --- NEW: SCHEDULE VISITATION SECTION ---
+        with st.expander("📅 Schedule a Future Visitation"):
+            st.write(
+                f"Have you been able to schedule a visitation for **{full_name}**? If so, enter the details below:")
+
+            col_d, col_t = st.columns(2)
+            with col_d:
+                # 'format' changes how it looks in the app
+                v_date = st.date_input(
+                    "Select Date",
+                    key=f"date_in_{row_number}",
+                    format="MM/DD/YYYY"
+                )
+            with col_t:
+                # Let the user pick from the list, defaulting to 01:00 PM
+                selected_time_str = st.selectbox(
+                    "Select Time",
+                    options=TIME_OPTIONS,
+                    index=DEFAULT_TIME_INDEX,
+                    key=f"time_select_{row_number}"
+                )
+
+            if st.button("Save Schedule", key=f"sched_btn_{row_number}"):
+                # Format for the Google Sheet
+                date_str = v_date.strftime("%m/%d/%Y")
+                # FIX: Use the string from the selectbox directly
+                time_str = selected_time_str
+
+                with st.spinner("Saving to spreadsheet..."):
+                    saved = update_cells(tab_name, {
+                        f"J{row_number}": date_str,
+                        f"K{row_number}": time_str,
+                    })
+
+                if saved:
+                    # --- UPDATED: NOTIFY ALL OFFICERS INDIVIDUALLY ---
+                    officer_map = st.secrets["USER_MAP"]
+                    notification_msg = schedule_message(full_name, date_str, time_str)
+
+                    # DM every officer in your secrets (delivered in the background)
+                    send_telegram_messages(
+                        (off_name, chat_id, notification_msg)
+                        for off_name, chat_id in officer_map.items()
+                    )
+
+                    st.success(f"Scheduled and all officers notified!")
+                    st.rerun()
+            st.caption("⚠️ **FYI:** Clicking the button above will immediately notify the rest of the officers via Telegram.")
+
+        # 5. Past months from the archive tabs
+        render_visit_history(member, key=f"mine_history_{tab_name}_{row_number}")
+
+
+@timed_fragment
+def render_scheduled_card(tab_name, row_number, user_name, show_tab=False):
+    """One card in "View Scheduled Visitations"; an RSVP reruns only this card."""
+    roster = get_roster(tab_name)
+    member = roster.by_row.get(row_number)
+    if member is None:
+        return
+    officer_names = list(roster.rsvp_names)
+    officer_cols = dict(zip(officer_names, ["L", "M", "N", "O", "P", "Q", "R", "S"]))
+
+    # --- DEFINE VARIABLES FIRST ---
+    full_name = member.full_name
+
+    address = member.address or "No Address"
+    visit_date = member.visit_date_str  # Column J
+    visit_time = member.visit_time or "TBD"  # Column K
+
+    label = f"👤 {full_name}  ·  📅 {visit_date} {visit_time}"
+    if show_tab:
+        label += f"  ·  🗂️ {tab_name}"
+    card = st.expander(label, key=f"sched_card_{tab_name}_{row_number}", on_change="rerun")
+    if not card.open:
+        return
+
+    with card:
+        # Display Date and Time as plain text
+        st.write(f"📅 **Date:** {visit_date}    ⏰ **Time:** {visit_time}")
+
+        # Create the clickable Google Maps URL
+        # We use address.replace(' ', '+') to make the URL web-safe
+        maps_url = f"https://www.google.com/maps/search/?api=1&query={address.replace(' ', '+')}"
+
+        # Display the address as a blue hyperlink
+        st.markdown(f"📍 **Location:** [{address}]({maps_url})")
+
+        # Attendance Check
+        attending = roster.attendees(member)
+        if attending:
+            st.success(f"👥 **Attending:** {', '.join(attending)}")
+        else:
+            st.caption("No officers have responded yet.")
 
-    target_tab = st.selectbox("Select Month to View", options=month_list, index=default_idx)
+        # RSVP Section
+        st.divider()
+        if user_name in officer_names:
+            col_letter = officer_cols.get(user_name)
+            if user_name not in attending:
 
-    # 2. Re-fetch data ONLY if the user changes the dropdown
-    if target_tab != initial_tab:
-        all_rows = get_sheet_data(target_tab)
+                st.caption(f"💡 Click the button below if you can make the visitation for **{full_name}**")
 
-    st.divider()
+                if st.button(f"🙋‍♂️ I can attend ({full_name})", key=f"rsvp_{tab_name}_{row_number}"):
+                    if update_cells(tab_name, {f"{col_letter}{row_number}": "TRUE"}):
+                        st.success("RSVP Saved!")
+                        rerun_card()
+            else:
+                st.button(f"✅ You are attending ({full_name})", disabled=True, key=f"done_{tab_name}_{row_number}")
+        else:
+            st.warning("You are not listed in the attendance columns (L-S).")
+
+
+@timed_fragment
+def render_assign_card(tab_name, row_number):
+    """One member card in "Assign officers"; changing its selectbox reruns only this card."""
+    member = get_roster(tab_name).by_row.get(row_number)
+    if member is None:
+        return
+    unique_key = f"{tab_name}_{row_number}"
+
+    full_name = member.full_name
+    current_officer = member.officer
+    last_visited = member.last_visited or None
+
+    card = st.expander(f"{full_name}  ·  {current_officer if current_officer else 'Unassigned'}",
+                       key=f"assign_card_{tab_name}_{row_number}", on_change="rerun")
+    if not card.open:
+        return
+
+    with card:
+        col_info, col_action = st.columns([1.5, 1])
+        with col_info:
+            if last_visited:
+                st.write(f"🕒 **Last Visited:** {last_visited}")
+            st.caption(f"📍 Currently: **{current_officer if current_officer else 'Unassigned'}**")
+
+        with col_action:
+            try:
+                default_index = names.index(current_officer) + 1 if current_officer in names else 0
+            except ValueError:
+                default_index = 0
+
+            new_assignment = st.selectbox(
+                "Assign:",
+                options=["-- Select --"] + names,
+                index=default_index,
+                key=f"reassign_{unique_key}"
+            )
+
+            if new_assignment != current_officer and new_assignment != "-- Select --":
+                if st.button("Update Sheet", key=f"upd_btn_{unique_key}"):
+                    with st.spinner(f"Updating {full_name}..."):
+                        if update_cells(tab_name, {f"G{row_number}": new_assignment}):
+                            st.success("Updated!")
+                            rerun_card()
+
+        # Who had this member before, so leadership can avoid repeats
+        render_visit_history(member, key=f"assign_history_{tab_name}_{row_number}")
+
+
+# --- LIVE UPDATES ---
+# Every session reads the same process-wide tab cache, so a write by any officer
+# bumps that tab's version for everyone. Sessions only compare version numbers
+# here; no API calls are made on their behalf.
+@timed_fragment(run_every=5)
+def watch_for_updates(tab_names, auto_reload):
+    cache = get_tab_cache()
+    # Tabs not rendered yet (or that failed to load) have nothing to compare against
+    seen = st.session_state.get("seen_versions", {})
+    tab_names = [tab for tab in tab_names if tab in seen]
+    # Lets the shared background revalidation run once the TTL is up; never loads a tab
+    cache.revalidate_stale(tab_names)
+    current = cache.versions(tab_names)
+    changed = [tab for tab in tab_names if current[tab] != seen[tab]]
+    if not changed:
+        return
+    if auto_reload:
+        st.rerun()
+    st.info(f"🔄 Someone updated {', '.join(changed)} since this page loaded.")
+    if st.button("Load latest changes", key="load_latest"):
+        st.rerun()
+
+
+# --- DIAGNOSTICS (VISITATION_METRICS=1) ---
+def render_diagnostics():
+    """Leadership-only view of recent timings, cache counters and Sheets quota use."""
+    with st.expander("📈 Performance Diagnostics"):
+        spans = metrics.summary()
+        if spans:
+            st.markdown("**Recent timings** (last runs and calls, slowest total first)")
+            st.dataframe(spans, hide_index=True, width="stretch")
+        else:
+            st.caption("No timings recorded yet.")
+
+        counters = metrics.counters()
+        cache_rows = []
+        for name in sorted({key.rsplit(".", 1)[0] for key in counters if key.startswith("cache.")}):
+            calls = counters.get(f"{name}.calls", 0)
+            misses = counters.get(f"{name}.miss", 0)
+            cache_rows.append({"Cache": name[len("cache."):], "Calls": calls, "Hits": calls - misses,
+                               "Misses": misses})
+        tab_cache = {kind: counters.get(f"tab_cache.{kind}", 0) for kind in ("hit", "stale", "snapshot", "miss")}
+        col_cache, col_tabs = st.columns([2, 1])
+        with col_cache:
+            st.markdown("**st.cache_resource**")
+            st.dataframe(cache_rows, hide_index=True, width="stretch")
+        with col_tabs:
+            st.markdown("**Tab cache**")
+            st.dataframe([{"Result": k, "Count": v} for k, v in tab_cache.items()],
+                         hide_index=True, width="stretch")
+
+        st.markdown(f"**Sheets API calls** ({counters.get('sheets.retries', 0)} retried)")
+        st.dataframe(
+            [
+                {"Call": op, "Calls": stat["calls"], "Errors": stat["errors"], "Retries": stat["retries"],
+                 "KB": round(stat["bytes"] / 1024, 1), "Avg ms": round(stat["total_s"] / stat["calls"] * 1000, 1),
+                 "Max ms": round(stat["max_s"] * 1000, 1)}
+                for op, stat in get_sheets_gateway().stats().items()
+            ],
+            hide_index=True,
+            width="stretch",
+        )
+
+        col_export, col_reset = st.columns([2, 1])
+        with col_export:
+            st.download_button("⬇️ Export recent spans (JSONL)", metrics.export(),
+                               file_name="visitation_metrics.jsonl", mime="application/jsonl")
+            if metrics.log_path:
+                st.caption(f"Also logging every span to `{metrics.log_path}`.")
+        with col_reset:
+            if st.button("Reset", key="metrics_reset"):
+                metrics.reset()
+                st.rerun()
 
-    # Step 2: Present THREE Menu Options
-    menu_choice = st.radio(
-        f"Hi {user_name}, what would you like to do?",
-        ["View My Assignments", "View Scheduled Visitations", "Assign officers (leadership)"],
-        horizontal=True
-    )
 
-    st.divider()
+# --- 3. MAIN UI ---
+with timed_script_run("main"):
+    st.title("📋 Visitation App")
 
-    # --- OPTION 1: PERSONAL ASSIGNMENTS ---
-    if menu_choice == "View My Assignments":
-        st.subheader(f"Assignments for {user_name}")
+    user_name = st.selectbox("Who is viewing?", options=["-- Select Name --"] + names)
+    record_first_paint("name picker")
 
-        my_assignments = [
-            row for row in all_rows[4:]
-            if len(row) > 6 and row[6].strip().lower() == user_name.lower()
-        ]
+    if user_name == "-- Select Name --":
+        preload()
+        start_warm_up()
+    else:
+        # Each full run records the versions it renders afresh (see remember_version)
+        st.session_state["seen_versions"] = {}
 
-        if my_assignments:
-            for row in my_assignments:
-                row_number = all_rows.index(row) + 1
+        available_tabs = get_tab_names()
+        # Filter out hidden tabs AND any tab that starts with "Archive"
+        month_list = month_tabs(available_tabs)
 
-                # Corrected Mapping (First Last)
-                first_name = row[1] if len(row) > 1 else ""
-                last_name = row[0] if len(row) > 0 else ""
-                full_name = f"{first_name} {last_name}".strip()
+        # Determine the safe starting tab
+        initial_tab = pick_initial_tab(month_list)
 
-                dob = row[2] if len(row) > 2 and row[2].strip() != "" else "N/A"
-                anniversary = row[3] if len(row) > 3 and row[3].strip() != "" else "N/A"
-                last_visited = row[20] if len(row) > 20 and row[20].strip() != "" else None
-                address_for_map = row[4] if len(row) > 4 else ""
-                phone = row[5] if len(row) > 5 else "N/A"
+        if not initial_tab:
+            st.error("No active month tabs found! Please ensure your month tab (e.g., 'March') is not named 'Archive'.")
+            st.stop()
 
-                # Check Attempt Status
-                try_1 = len(row) > 7 and row[7].upper() == 'TRUE'
-                try_2 = len(row) > 8 and row[8].upper() == 'TRUE'
+        roster = get_roster(initial_tab)
 
-                with st.container(border=True):
-                    # 1. Header and Dates
-                    st.markdown(f"### 👤 {full_name}")
-                    st.markdown(f"🎂 **DOB:** {dob}    💍 **Married:** {anniversary}")
-
-                    # Display Last Visited only if it exists
-                    if last_visited:
-                        st.info(f"🕒 **Last Visited:** {last_visited}")
-
-                    # 2. Action Buttons (Phone & Maps)
-                    col1, col2 = st.columns(2)
-                    with col1:
-                        st.markdown(f"📞 [{phone}](tel:{phone.replace('-', '').replace(' ', '')})")
-                    with col2:
-                        if address_for_map:
-                            map_search_url = f"https://www.google.com/maps/search/?api=1&query={address_for_map.replace(' ', '+')}"
-                            st.link_button("🗺️ Open Maps", map_search_url, use_container_width=True)
-                        else:
-                            st.button("No Address Found", disabled=True, use_container_width=True)
-
-                    # 3. Progress Display
-                    st.write("---")
-                    if try_1 and try_2:
-                        st.success("✅ **Goal Reached:** 2 of 2 attempts completed.")
-                    elif try_1:
-                        st.info("🟡 **Progress:** 1 of 2 attempts completed.")
-                    else:
-                        st.warning("⚪ **Not Started:** 0 attempts completed.")
-
-                    # 4. Log Visit Section
-                    with st.expander("📝 Log a Visitation Attempt"):
-                        attempt_choice = st.selectbox(
-                            "Which attempt did you complete?",
-                            options=["-- Select --", "Try #1", "Try #2"],
-                            key=f"status_{row_number}"
-                        )
+        # --- ADMIN NOTIFICATION (RESTORED) ---
+        # Only notify if the user is NOT you and hasn't been notified this session
+        if user_name != "Carlos" and f"notified_{user_name}" not in st.session_state:
+            admin_id = st.secrets["DEFAULT_CHAT_ID"]
+            send_telegram_message(f"🚀 **App Activity:** {user_name} has logged into the Visitation Portal.", admin_id)
+            st.session_state[f"notified_{user_name}"] = True
 
-                        if st.button(f"Confirm attempt for {full_name}", key=f"btn_{row_number}"):
-                            if attempt_choice == "-- Select --":
-                                st.warning("Please select an attempt number.")
-                            else:
-                                client = get_sheet_client()
-                                sheet = client.open_by_key(SPREADSHEET_ID).worksheet(target_tab)
-                                col_to_update = "H" if attempt_choice == "Try #1" else "I"
-
-                                with st.spinner("Updating spreadsheet..."):
-                                    sheet.update_acell(f"{col_to_update}{row_number}", "TRUE")
-                                    st.success("Updated!")
-                                    st.cache_data.clear()
-                                    st.rerun()
-                    # --- NEW: SCHEDULE VISITATION SECTION ---
-                    with st.expander("📅 Schedule a Future Visitation"):
-                        st.write(
-                            f"Have you been able to schedule a visitation for **{full_name}**? If so, enter the details below:")
-
-                        col_d, col_t = st.columns(2)
-                        with col_d:
-                            # 'format' changes how it looks in the app
-                            v_date = st.date_input(
-                                "Select Date",
-                                key=f"date_in_{row_number}",
-                                format="MM/DD/YYYY"
-                            )
-                        with col_t:
-                            # 1. Generate a clean list of 30-minute increments
-                            time_options = []
-                            periods = ["AM", "PM"]
-                            # We'll use 12, then 1-11 to keep the standard clock order
-                            hours = [12] + list(range(1, 12))
-
-                            for period in periods:
-                                for hour in hours:
-                                    # format to 2 digits for cleaner look, e.g., "01:00 PM"
-                                    h_str = str(hour).zfill(2)
-                                    time_options.append(f"{h_str}:00 {period}")
-                                    time_options.append(f"{h_str}:30 {period}")
-
-                            # 2. Let the user pick from the list
-                            # Setting index 26 usually lands on 01:00 PM
-                            selected_time_str = st.selectbox(
-                                "Select Time",
-                                options=time_options,
-                                index=26 if len(time_options) > 26 else 0,
-                                key=f"time_select_{row_number}"
-                            )
-
-                        if st.button("Save Schedule", key=f"sched_btn_{row_number}"):
-                            client = get_sheet_client()
-                            sheet = client.open_by_key(SPREADSHEET_ID).worksheet(
-                                target_tab)
-
-                            # Format for the Google Sheet
-                            date_str = v_date.strftime("%m/%d/%Y")
-                            # FIX: Use the string from the selectbox directly
-                            time_str = selected_time_str
-
-                            with st.spinner("Saving to spreadsheet..."):
-                                sheet.update_acell(f"J{row_number}", date_str)
-                                sheet.update_acell(f"K{row_number}", time_str)
-
-                                # --- UPDATED: NOTIFY ALL OFFICERS INDIVIDUALLY ---
-                                app_url = "https://visitation-assignment-app.streamlit.app/"
-                                officer_map = st.secrets["USER_MAP"]
-
-                                notification_msg = (
-                                    f"📅 **New Visitation Scheduled!**\n\n"
-                                    f"A visitation has been scheduled for **{full_name}** on {date_str} at {time_str}.\n\n"
-                                    f"Please click the link below to let everyone know if you can attend:\n"
-                                    f"{app_url}"
-                                )
-
-                                # This loops through every officer in your secrets and sends a DM
-                                for off_name, chat_id in officer_map.items():
-                                    try:
-                                        send_telegram_message(notification_msg, chat_id)
-                                    except Exception as e:
-                                        st.error(f"Could not notify {off_name}: {e}")
-
-                                st.success(f"Scheduled and all officers notified!")
-                                st.cache_data.clear()
-                                st.rerun()
-                        st.caption("⚠️ **FYI:** Clicking the button above will immediately notify the rest of the officers via Telegram.")
-        else:
-            st.info("No active assignments found for you at this time.")
-
-    # Option 2: Scheduled Visitations
-    elif menu_choice == "View Scheduled Visitations":
-        st.subheader("🗓️ Upcoming Scheduled Visitations")
-
-        # 1. Get today's date for comparison
-        today = datetime.date.today()
-
-        # 2. Filter rows where Column J (index 9) is not empty AND is NOT in the past
-        scheduled = []
-        for row in all_rows[4:]:
-            if len(row) > 9 and row[9].strip() != "":
-                date_str = row[9].strip()
-                try:
-                    # Convert spreadsheet string "MM/DD/YYYY" to a date object
-                    visit_date_obj = datetime.datetime.strptime(date_str, "%m/%d/%Y").date()
-
-                    # ONLY include if the date is today or in the future
-                    if visit_date_obj >= today:
-                        scheduled.append(row)
-                except ValueError:
-                    # This skips rows with invalid date formats so the app doesn't crash
-                    continue
-
-        if not scheduled:
-            st.info("No upcoming visitations scheduled. (Past visits are hidden)")
-        else:
-            header_row = all_rows[3]
-            officer_names = [header_row[i] for i in range(11, 19)]
-            col_letters = ["L", "M", "N", "O", "P", "Q", "R", "S"]
-            officer_cols = dict(zip(officer_names, col_letters))
+        # 1. Dynamic Month Selector
+        # Use initial_tab to set the default index
+        try:
+            default_idx = month_list.index(initial_tab)
+        except ValueError:
+            default_idx = 0
 
-            for row in scheduled:
-                row_number = all_rows.index(row) + 1
+        target_tab = st.selectbox("Select Month to View", options=month_list, index=default_idx)
 
-                # --- DEFINE VARIABLES FIRST ---
-                first_name = row[1] if len(row) > 1 else ""
-                last_name = row[0] if len(row) > 0 else ""
-                full_name = f"{first_name} {last_name}".strip()
+        # 2. Re-fetch data ONLY if the user changes the dropdown
+        if target_tab != initial_tab:
+            roster = get_roster(target_tab)
 
-                address = row[4] if len(row) > 4 else "No Address"
-                visit_date = row[9]  # Column J
-                visit_time = row[10] if len(row) > 10 else "TBD"  # Column K
+        st.divider()
 
-                with st.container(border=True):
-                    st.markdown(f"### 👤 {full_name}")
+        # Step 2: Present THREE Menu Options
+        menu_choice = st.radio(
+            f"Hi {user_name}, what would you like to do?",
+            ["View My Assignments", "View Scheduled Visitations", "Assign officers (leadership)"],
+            horizontal=True
+        )
 
-                    # Display Date and Time as plain text
-                    st.write(f"📅 **Date:** {visit_date}    ⏰ **Time:** {visit_time}")
+        st.divider()
 
-                    # Create the clickable Google Maps URL
-                    # We use address.replace(' ', '+') to make the URL web-safe
-                    maps_url = f"https://www.google.com/maps/search/?api=1&query={address.replace(' ', '+')}"
+        # Delivery status of this session's Telegram messages (sent in the background)
+        if recent_notification_batches():
+            show_notification_status()
 
-                    # Display the address as a blue hyperlink
-                    st.markdown(f"📍 **Location:** [{address}]({maps_url})")
+        # Filled in by watch_for_updates once the view below has rendered (and loaded its tabs)
+        updates_slot = st.container()
 
-                    # Attendance Check
-                    attending = [all_rows[3][i] for i in range(11, 19) if len(row) > i and row[i].upper() == 'TRUE']
-                    if attending:
-                        st.success(f"👥 **Attending:** {', '.join(attending)}")
-                    else:
-                        st.caption("No officers have responded yet.")
-
-                    # RSVP Section
-                    st.divider()
-                    if user_name in officer_names:
-                        col_letter = officer_cols.get(user_name)
-                        if user_name not in attending:
-
-                            st.caption(f"💡 Click the button below if you can make the visitation for **{full_name}**")
-
-                            if st.button(f"🙋‍♂️ I can attend ({full_name})", key=f"rsvp_{row_number}"):
-                                client = get_sheet_client()
-                                sheet = client.open_by_key(SPREADSHEET_ID).worksheet(target_tab)
-                                sheet.update_acell(f"{col_letter}{row_number}", "TRUE")
-                                st.success("RSVP Saved!")
-                                st.cache_data.clear()
-                                st.rerun()
-                        else:
-                            st.button(f"✅ You are attending ({full_name})", disabled=True, key=f"done_{row_number}")
-                    else:
-                        st.warning("You are not listed in the attendance columns (L-S).")
+        # --- OPTION 1: PERSONAL ASSIGNMENTS ---
+        if menu_choice == "View My Assignments":
+            st.subheader(f"Assignments for {user_name}")
 
-    # --- OPTION 3: ASSIGN OFFICERS ---
-    else:
-        st.subheader("🛠️ Assign Officers (Leadership)")
+            my_assignments = roster.assigned_to(user_name)
+
+            if my_assignments:
+                shown = filter_members(roster, my_assignments, "mine")
+                for member in paginate(shown, "mine"):
+                    render_assignment_card(target_tab, member.row_number)
+            else:
+                st.info("No active assignments found for you at this time.")
+
+        # Option 2: Scheduled Visitations
+        elif menu_choice == "View Scheduled Visitations":
+            st.subheader("🗓️ Upcoming Scheduled Visitations")
+
+            # 1. Get today's date for comparison
+            today = datetime.date.today()
+
+            all_months = st.toggle("Show upcoming visits from all months", key="sched_all_months")
+
+            if all_months:
+                # Every month tab loads in parallel; tabs already cached cost nothing
+                rosters, failed = get_tab_cache().rosters(month_list)
+                for tab_name, error in failed.items():
+                    st.warning(f"Could not load the {tab_name} tab: {error}")
+                for tab_name, tab_roster in rosters.items():
+                    remember_version(tab_name, tab_roster.version)
+
+                query, wanted = member_filter_controls("sched_all")
+                # One date-sorted timeline; each entry keeps its tab so RSVPs write to the right sheet
+                timeline = sorted(
+                    (
+                        (member.visit_date, tab_name, member)
+                        for tab_name, tab_roster in rosters.items()
+                        for member in apply_member_filter(
+                            tab_roster, tab_roster.scheduled_from(today), query, wanted)
+                    ),
+                    key=lambda entry: entry[0],
+                )
+
+                if not timeline:
+                    st.info("No upcoming visitations scheduled in any month. (Past visits are hidden)")
+                for visit_date, tab_name, member in paginate(timeline, "sched_all"):
+                    render_scheduled_card(tab_name, member.row_number, user_name, show_tab=True)
+            else:
+                # 2. Members whose Column J date is today or later (invalid dates are skipped at parse time)
+                scheduled = roster.scheduled_from(today)
 
-        all_members = [
-            row for row in all_rows[4:]
-            if len(row) > 19 and str(row[19]).strip().upper() == "YES"
-        ]
+                if not scheduled:
+                    st.info("No upcoming visitations scheduled. (Past visits are hidden)")
+                else:
+                    shown = filter_members(roster, scheduled, "sched")
+                    for member in paginate(shown, "sched"):
+                        render_scheduled_card(target_tab, member.row_number, user_name)
 
-        if not all_members:
-            st.warning("⚠️ No members found. Ensure Column T is 'YES' in the spreadsheet.")
+        # --- OPTION 3: ASSIGN OFFICERS ---
         else:
-            # --- 1. BATCH NOTIFICATION SECTION ---
-            st.info("Assign everyone first, then use the button below to notify all officers.")
-
-            with st.container(border=True):
-                col_notif, col_switch = st.columns([2, 1])
-                with col_switch:
-                    confirm_all = st.toggle("Unlock Batch Notify", key="unlock_top")
-                with col_notif:
-                    if st.button("📢 Send New Assignments via Telegram", disabled=not confirm_all,
-                                 type="primary", use_container_width=True):
-
-                        officer_map = st.secrets["USER_MAP"]
-                        notified_count = 0
-                        summary = {}
-
-                        # Loop 1: Just gather data for the messages
-                        for row in all_members:
-                            off = row[6].strip().title() if len(row) > 6 else ""
-                            member_name = f"{row[1]} {row[0]}".strip()
-
-                            if off in officer_map:
-                                if off not in summary: summary[off] = []
-                                summary[off].append(member_name)
-
-                        # Loop 2: Send the grouped messages
-                        for off, assigned_members in summary.items():
-                            # The URL of your web app
-                            app_url = "https://visitation-assignment-app.streamlit.app/"
-
-                            # Constructing the clean Markdown message
-                            msg = (
-                                f"📋 **{target_tab} Visitation Assignments Have Been Made**\n\n"
-                                f"To see your assignments, [click here]({app_url})"
-                            )
-
-                            send_telegram_message(msg, officer_map[off])
-                            notified_count += 1
-
-                        # SUCCESS MESSAGE: Now safely inside the button logic
-                        st.success(f"Sent summaries to {notified_count} officers!")
-
-            st.divider()
-
-            # --- 2. INDIVIDUAL MEMBER CARDS SECTION ---
-            # Loop 3: Create the UI cards
-            for row in all_members:
-                row_idx = all_rows.index(row)
-                row_number = row_idx + 1
-                unique_key = f"{target_tab}_{row_number}"
-
-                first_name = row[1] if len(row) > 1 else ""
-                last_name = row[0] if len(row) > 0 else ""
-                full_name = f"{first_name} {last_name}".strip()
-                current_officer = row[6].strip() if len(row) > 6 else ""
-                last_visited = row[20] if len(row) > 20 and row[20].strip() != "" else None
+            st.subheader("🛠️ Assign Officers (Leadership)")
+
+            all_members = roster.active
+
+            if not all_members:
+                st.warning("⚠️ No members found. Ensure Column T is 'YES' in the spreadsheet.")
+            else:
+                # --- 1. BATCH NOTIFICATION SECTION ---
+                st.info("Assign everyone first, then use the button below to notify all officers.")
 
                 with st.container(border=True):
-                    col_info, col_action = st.columns([1.5, 1])
-                    with col_info:
-                        st.markdown(f"### {full_name}")
-                        if last_visited:
-                            st.write(f"🕒 **Last Visited:** {last_visited}")
-                        st.caption(f"📍 Currently: **{current_officer if current_officer else 'Unassigned'}**")
-
-                    with col_action:
+                    col_notif, col_switch = st.columns([2, 1])
+                    with col_switch:
+                        confirm_all = st.toggle("Unlock Batch Notify", key="unlock_top")
+                    with col_notif:
+                        if st.button("📢 Send New Assignments via Telegram", disabled=not confirm_all,
+                                     type="primary", use_container_width=True):
+
+                            officer_map = st.secrets["USER_MAP"]
+
+                            # Loop 1: Just gather data for the messages
+                            summary = assignment_summary(all_members, officer_map)
+
+                            # Loop 2: Send the grouped messages
+                            msg = assignment_message(target_tab)
+                            send_telegram_messages((off, officer_map[off], msg) for off in summary)
+
+                            # SUCCESS MESSAGE: Now safely inside the button logic
+                            st.success(f"Queued summaries for {len(summary)} officers!")
+                            # Rerun so the delivery status shows at the top of the page
+                            st.rerun()
+
+                st.divider()
+
+                assign_mode = st.radio(
+                    "How would you like to assign?",
+                    ["Bulk table", "Auto-assign", "Member cards"],
+                    horizontal=True,
+                    key="assign_mode"
+                )
+
+                # --- 2a. BULK TABLE: stage any number of edits, then commit them in one write ---
+                if assign_mode == "Bulk table":
+                    st.caption("Change as many assignments as you like, review them, then save them all at once.")
+
+                    table = [
+                        {
+                            "Row": member.row_number,
+                            "Member": member.full_name,
+                            "Last Visited": member.last_visited,
+                            "Currently": member.officer or "Unassigned",
+                            "Assign": member.officer if member.officer in names else None,
+                        }
+                        for member in all_members
+                    ]
+                    # Keyed on the tab only: other officers' writes must not throw away staged edits.
+                    # This session's own commit clears them below.
+                    editor_key = f"bulk_assign_{target_tab}"
+                    edited = st.data_editor(
+                        table,
+                        key=editor_key,
+                        hide_index=True,
+                        width="stretch",
+                        disabled=["Member", "Last Visited", "Currently"],
+                        column_config={
+                            "Row": None,
+                            "Assign": st.column_config.SelectboxColumn("Assign", options=names),
+                        },
+                    )
+
+                    # Matched by sheet row, not position, in case the roster changed under the editor
+                    pending = []
+                    for row in edited:
+                        member = roster.by_row.get(row["Row"])
+                        if member and row["Assign"] and row["Assign"] != member.officer:
+                            pending.append((member, row["Assign"]))
+
+                    if not pending:
+                        st.info("No changes staged yet.")
+                    else:
+                        st.markdown(f"**{len(pending)} pending change(s):**")
+                        st.dataframe(
+                            [
+                                {"Member": member.full_name, "From": member.officer or "Unassigned", "To": new_officer}
+                                for member, new_officer in pending
+                            ],
+                            hide_index=True,
+                            width="stretch",
+                        )
+                        if st.button(f"💾 Save {len(pending)} assignment(s)", type="primary", key="bulk_commit"):
+                            with st.spinner("Updating spreadsheet..."):
+                                saved = update_cells(target_tab, {
+                                    f"G{member.row_number}": new_officer for member, new_officer in pending
+                                })
+                            if saved:
+                                st.session_state.pop(editor_key, None)
+                                st.success("Updated!")
+                                st.rerun()
+
+                # --- 2b. AUTO-ASSIGN: balanced proposal for everyone unassigned, committed in one write ---
+                elif assign_mode == "Auto-assign":
+                    st.caption("Spreads unassigned members across officers so everyone ends up with a similar load.")
+
+                    previous_tab = previous_month_tab(target_tab, available_tabs)
+                    avoid_repeat = st.toggle(
+                        f"Don't repeat last month's officer ({previous_tab})" if previous_tab
+                        else "Don't repeat last month's officer (no previous month tab found)",
+                        value=bool(previous_tab),
+                        disabled=not previous_tab,
+                        key="auto_avoid_repeat",
+                    )
+                    previous = {}
+                    if avoid_repeat and previous_tab:
                         try:
-                            default_index = names.index(current_officer) + 1 if current_officer in names else 0
-                        except ValueError:
-                            default_index = 0
-
-                        new_assignment = st.selectbox(
-                            "Assign:",
-                            options=["-- Select --"] + names,
-                            index=default_index,
-                            key=f"reassign_{unique_key}"
+                            previous = get_previous_officers(previous_tab)
+                        except Exception as e:
+                            st.warning(f"Could not read the {previous_tab} tab, so repeats aren't avoided: {e}")
+
+                    proposal = propose_assignments(all_members, names, previous)
+
+                    if not proposal:
+                        st.info("Every active member already has an officer.")
+                    else:
+                        loads = {name: sum(m.active for m in roster.assigned_to(name)) for name in names}
+                        added = {name: 0 for name in names}
+                        for member, officer in proposal:
+                            added[officer] += 1
+                        st.dataframe(
+                            [
+                                {"Officer": name, "Currently": loads[name], "Adding": added[name],
+                                 "Total": loads[name] + added[name]}
+                                for name in names
+                            ],
+                            hide_index=True,
+                            width="stretch",
+                        )
+                        st.markdown(f"**Proposed assignments for {len(proposal)} member(s):**")
+                        st.dataframe(
+                            [
+                                {"Member": member.full_name, "Last Visited": member.last_visited, "Officer": officer}
+                                for member, officer in proposal
+                            ],
+                            hide_index=True,
+                            width="stretch",
                         )
+                        if st.button(f"💾 Save {len(proposal)} assignment(s)", type="primary", key="auto_commit"):
+                            with st.spinner("Updating spreadsheet..."):
+                                saved = update_cells(target_tab, {
+                                    f"G{member.row_number}": officer for member, officer in proposal
+                                })
+                            if saved:
+                                st.success("Updated!")
+                                st.rerun()
 
-                        if new_assignment != current_officer and new_assignment != "-- Select --":
-                            if st.button("Update Sheet", key=f"upd_btn_{unique_key}"):
-                                client = get_sheet_client()
-                                sheet = client.open_by_key(SPREADSHEET_ID).worksheet(
-                                    target_tab)
-                                with st.spinner(f"Updating {full_name}..."):
-                                    sheet.update_acell(f"G{row_number}", new_assignment)
-                                    st.success("Updated!")
-                                    st.cache_data.clear()
-                                    st.rerun()
-
-# --- 4. EXTERNAL LINK SECTION ---
-st.divider()
-st.info("💡 **Tip:** If you need to view or update the spreadsheet manually, [click here](https://docs.google.com/spreadsheets/d/1i3Q9ff1yA3mTLJJS8-u8vcW3cz-B7envmThxijfyWTk/edit?usp=sharing).")
-
-# Logout option in the bottom
-if st.button("Logout"):
-    st.session_state["authenticated"] = False
-    st.rerun()
\ No newline at end of file
+                # --- 2c. INDIVIDUAL MEMBER CARDS SECTION ---
+                else:
+                    # Loop 3: Create the UI cards for the filtered, current page only
+                    shown = filter_members(roster, all_members, "assign")
+                    for member in paginate(shown, "assign"):
+                        render_assign_card(target_tab, member.row_number)
+
+            if metrics.enabled:
+                render_diagnostics()
+
+        # Pick up other officers' changes; leadership is only prompted so staged edits aren't lost
+        showing_all = menu_choice == "View Scheduled Visitations" and st.session_state.get("sched_all_months")
+        with updates_slot:
+            watch_for_updates(month_list if showing_all else [target_tab],
+                              auto_reload=menu_choice != "Assign officers (leadership)")
+
+    # --- 4. EXTERNAL LINK SECTION ---
+    st.divider()
+    st.info("💡 **Tip:** If you need to view or update the spreadsheet manually, [click here](https://docs.google.com/spreadsheets/d/1i3Q9ff1yA3mTLJJS8-u8vcW3cz-B7envmThxijfyWTk/edit?usp=sharing).")
+
+    # Logout option in the bottom
+    if st.button("Logout"):
+        st.session_state["authenticated"] = False
+        st.rerun()
\ No newline at end of file
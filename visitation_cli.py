@@ -0,0 +1,112 @@
+"""Command-line entry point for scheduled (cron) Telegram notifications.
+
+Reads the same secrets as the Streamlit app and sends messages directly, so it
+can run without the web app being up (Python 3.11+, for tomllib):
+
+    python visitation_cli.py assignments --tab March
+    python visitation_cli.py reminders --days 3
+
+Example crontab (reminders every morning at 8):
+
+    0 8 * * * cd /path/to/app && python visitation_cli.py reminders --days 2
+"""
+import argparse
+import datetime
+import logging
+import sys
+import tomllib
+
+from visitation_core import (
+    SPREADSHEET_ID, SheetLoader, SheetsGateway, TabCache, TelegramDispatcher, assignment_message,
+    assignment_summary, authorize_sheets, month_tabs, pick_initial_tab, reminder_messages,
+    upcoming_visits,
+)
+
+DEFAULT_SECRETS = ".streamlit/secrets.toml"
+
+
+def load_secrets(path):
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def open_tab_cache(secrets):
+    """Blocking, uncached reads: a cron run always wants the sheet as it is now."""
+    gateway = SheetsGateway(authorize_sheets(secrets["google_credentials"]), SPREADSHEET_ID)
+    return gateway, TabCache(SheetLoader(gateway), snapshots=None)
+
+
+def assignment_messages(secrets, tab_name=None):
+    gateway, cache = open_tab_cache(secrets)
+    month_list = month_tabs(list(gateway.worksheets()))
+    tab_name = tab_name or pick_initial_tab(month_list)
+    if tab_name not in month_list:
+        raise SystemExit(f"No month tab named {tab_name!r}. Available: {', '.join(month_list)}")
+
+    officer_map = secrets["USER_MAP"]
+    summary = assignment_summary(cache.roster(tab_name).active, officer_map)
+    msg = assignment_message(tab_name)
+    return [(off, officer_map[off], msg) for off in summary]
+
+
+def reminder_batch(secrets, days):
+    gateway, cache = open_tab_cache(secrets)
+    rosters, errors = cache.rosters(month_tabs(list(gateway.worksheets())))
+    for tab_name, error in errors.items():
+        print(f"warning: could not load the {tab_name} tab: {error}", file=sys.stderr)
+
+    visits = upcoming_visits(rosters, datetime.date.today(), days)
+    return reminder_messages(visits, secrets["USER_MAP"])
+
+
+def deliver(secrets, messages, dry_run=False):
+    """Sends (or with dry_run, prints) the messages; returns the number of failures."""
+    if dry_run:
+        for recipient, chat_id, message in messages:
+            print(f"--- {recipient} ({chat_id})\n{message}\n")
+        print(f"Dry run: {len(messages)} message(s) not sent.")
+        return 0
+
+    results = TelegramDispatcher(secrets["TELEGRAM_TOKEN"]).broadcast(messages)
+    failures = 0
+    for result in results:
+        if result.ok:
+            print(f"sent    {result.recipient} ({result.attempts} attempt(s))")
+        else:
+            failures += 1
+            print(f"FAILED  {result.recipient}: {result.error}")
+    print(f"{len(results) - failures} of {len(results)} message(s) delivered.")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Send visitation notifications from the command line.")
+    parser.add_argument("--secrets", default=DEFAULT_SECRETS,
+                        help=f"Streamlit secrets file to read (default: {DEFAULT_SECRETS})")
+    parser.add_argument("--dry-run", action="store_true", help="Print the messages instead of sending them")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    assignments = commands.add_parser("assignments", help="Tell each officer a month's assignments are ready")
+    assignments.add_argument("--tab", help="Month tab to announce (default: current or next month)")
+
+    reminders = commands.add_parser("reminders", help="Remind officers of visits in the next N days")
+    reminders.add_argument("--days", type=int, default=3, help="How many days ahead to look (default: 3)")
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    secrets = load_secrets(args.secrets)
+
+    if args.command == "assignments":
+        messages = assignment_messages(secrets, args.tab)
+    else:
+        messages = reminder_batch(secrets, args.days)
+
+    if not messages:
+        print("Nothing to send.")
+        return 0
+    return 1 if deliver(secrets, messages, args.dry_run) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1258 @@
+"""Sheet reading, caching and Telegram delivery for the Visitation App.
+
+Everything here is free of Streamlit so it can be shared by the web app
+(visitation_app.py, which wraps these objects in st.cache_resource) and the
+headless command-line entry point (visitation_cli.py).
+
+gspread, google-auth and requests are imported on first use rather than here,
+so importing this module (and drawing the app's login screen) stays cheap;
+`preload()` pulls them in on a background thread ahead of time.
+"""
+import bisect
+import collections
+import contextlib
+import datetime
+import heapq
+import importlib
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# --- CONSTANTS ---
+SPREADSHEET_ID = "1i3Q9ff1yA3mTLJJS8-u8vcW3cz-B7envmThxijfyWTk"
+APP_URL = "https://visitation-assignment-app.streamlit.app/"
+# Local state that should survive restarts (notification queue, sheet snapshots)
+CACHE_DIR = os.environ.get(
+    "VISITATION_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".app_cache")
+)
+HIDDEN_TABS = ["Monthly Template", "Roster"]
+
+
+# --- INSTRUMENTATION ---
+class Metrics:
+    """Opt-in timings and counters for finding where a slow run spends its time.
+
+    Off unless VISITATION_METRICS=1 (or VISITATION_METRICS_LOG is set), and then
+    a span or count is a dict update under a lock. Only the last `window`
+    durations per span are kept, so the percentiles describe recent behaviour.
+    With a log path, every span is also appended there as one JSON line.
+    """
+
+    def __init__(self, enabled=False, log_path=None, window=500):
+        self.enabled = enabled or bool(log_path)
+        self.log_path = log_path
+        self.window = window
+        self._lock = threading.Lock()
+        self._spans = {}  # name -> deque of seconds
+        self._counters = {}
+        self._events = collections.deque(maxlen=window * 4)
+        self._log = None
+
+    @contextlib.contextmanager
+    def span(self, name, **fields):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            fields["error"] = type(e).__name__
+            raise
+        finally:
+            self.record(name, time.perf_counter() - start, **fields)
+
+    def record(self, name, seconds, **fields):
+        if not self.enabled:
+            return
+        event = {"ts": round(time.time(), 3), "span": name, "ms": round(seconds * 1000, 2), **fields}
+        with self._lock:
+            self._spans.setdefault(name, collections.deque(maxlen=self.window)).append(seconds)
+            self._events.append(event)
+            if self.log_path:
+                if self._log is None:
+                    os.makedirs(os.path.dirname(os.path.abspath(self.log_path)), exist_ok=True)
+                    self._log = open(self.log_path, "a", buffering=1)
+                self._log.write(json.dumps(event) + "\n")
+
+    def count(self, name, n=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + n
+
+    def summary(self):
+        """[{span, count, p50_ms, p90_ms, p99_ms, max_ms, total_ms}] by total time, largest first."""
+        with self._lock:
+            spans = {name: sorted(values) for name, values in self._spans.items()}
+        rows = []
+        for name, values in spans.items():
+            def pct(q):
+                return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+            rows.append({
+                "span": name, "count": len(values), "p50_ms": pct(0.5), "p90_ms": pct(0.9),
+                "p99_ms": pct(0.99), "max_ms": round(values[-1] * 1000, 1),
+                "total_ms": round(sum(values) * 1000, 1),
+            })
+        rows.sort(key=lambda row: row["total_ms"], reverse=True)
+        return rows
+
+    def counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def export(self):
+        """Recent span events as JSON lines."""
+        with self._lock:
+            return "".join(json.dumps(event) + "\n" for event in self._events)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+            self._events.clear()
+
+
+metrics = Metrics(
+    enabled=os.environ.get("VISITATION_METRICS", "").lower() in ("1", "true", "yes"),
+    log_path=os.environ.get("VISITATION_METRICS_LOG") or None,
+)
+
+
+# --- STARTUP ---
+HEAVY_MODULES = ("gspread", "google.oauth2.service_account", "requests", "requests.adapters")
+_preload_lock = threading.Lock()
+_preload_thread = None
+
+
+def _import_heavy_modules():
+    with metrics.span("startup.imports"):
+        for name in HEAVY_MODULES:
+            importlib.import_module(name)
+
+
+def preload():
+    """Imports the Google and HTTP stacks on a background thread, once per process."""
+    global _preload_thread
+    with _preload_lock:
+        if _preload_thread is None:
+            _preload_thread = threading.Thread(target=_import_heavy_modules, name="preload", daemon=True)
+            _preload_thread.start()
+        return _preload_thread
+
+
+# --- ROSTER MODEL ---
+# Rows 1-4 of every month tab are headers (row 4 holds the officer names for the
+# RSVP columns L-S). Members start on row 5.
+HEADER_ROWS = 4
+RSVP_COLS = range(11, 19)  # Columns L-S
+
+
+def _cell(row, idx):
+    return row[idx] if len(row) > idx else ""
+
+
+def parse_sheet_date(value):
+    """Parses a "MM/DD/YYYY" cell, returning None for blank or invalid dates."""
+    try:
+        return datetime.datetime.strptime(value.strip(), "%m/%d/%Y").date()
+    except ValueError:
+        return None
+
+
+class Member:
+    """One member row of a month tab, parsed once per data load."""
+    __slots__ = (
+        "row_number", "first_name", "last_name", "dob", "anniversary", "address",
+        "phone", "officer", "try_1", "try_2", "visit_date_str", "visit_date",
+        "visit_time", "rsvps", "active", "last_visited",
+    )
+
+    def __init__(self, row_number, row):
+        self.row_number = row_number  # 1-based sheet row, used for A1 writes
+        self.last_name = _cell(row, 0)
+        self.first_name = _cell(row, 1)
+        self.dob = _cell(row, 2).strip()
+        self.anniversary = _cell(row, 3).strip()
+        self.address = _cell(row, 4)
+        self.phone = _cell(row, 5)
+        self.officer = _cell(row, 6).strip()
+        self.try_1 = _cell(row, 7).upper() == "TRUE"
+        self.try_2 = _cell(row, 8).upper() == "TRUE"
+        self.visit_date_str = _cell(row, 9).strip()
+        self.visit_date = parse_sheet_date(self.visit_date_str) if self.visit_date_str else None
+        self.visit_time = _cell(row, 10)
+        self.rsvps = tuple(_cell(row, i).upper() == "TRUE" for i in RSVP_COLS)
+        self.active = _cell(row, 19).strip().upper() == "YES"
+        self.last_visited = _cell(row, 20).strip()
+
+    @property
+    def full_name(self):
+        return f"{self.first_name} {self.last_name}".strip()
+
+    @property
+    def status(self):
+        if not self.officer:
+            return "Unassigned"
+        if self.try_1 and self.try_2:
+            return "Goal reached"
+        if self.try_1 or self.try_2:
+            return "In progress"
+        return "Not started"
+
+
+MEMBER_STATUSES = ["Unassigned", "Not started", "In progress", "Goal reached"]
+
+
+class Roster:
+    """Parsed month tab with lookups by officer (G), active flag (T) and visit date (J),
+    plus a prefix search index over member and officer names."""
+    __slots__ = ("members", "rsvp_names", "by_row", "by_officer", "active", "by_date", "_dates", "_search",
+                 "version")
+
+    def __init__(self, all_rows, version=0):
+        self.version = version  # TabCache version of the rows this was built from
+        header_row = all_rows[HEADER_ROWS - 1] if len(all_rows) >= HEADER_ROWS else []
+        self.rsvp_names = tuple(_cell(header_row, i) for i in RSVP_COLS)
+        self.members = [
+            Member(idx + 1, row)
+            for idx, row in enumerate(all_rows[HEADER_ROWS:], start=HEADER_ROWS)
+        ]
+        self.by_row = {}
+        self.by_officer = {}
+        self.active = []
+        self.by_date = {}
+        for member in self.members:
+            self.by_row[member.row_number] = member
+            if member.officer:
+                self.by_officer.setdefault(member.officer.lower(), []).append(member)
+            if member.active:
+                self.active.append(member)
+            if member.visit_date:
+                self.by_date.setdefault(member.visit_date, []).append(member)
+        self._dates = sorted(self.by_date)
+        # Sorted (token, row) pairs; a prefix query is a bisect range, not a scan
+        self._search = sorted(
+            (token, member.row_number)
+            for member in self.members
+            for token in f"{member.first_name} {member.last_name} {member.officer}".lower().split()
+        )
+
+    def search(self, query):
+        """Row numbers whose member or officer names start with every word of `query`."""
+        matches = None
+        for word in query.lower().split():
+            i = bisect.bisect_left(self._search, (word,))
+            rows = set()
+            while i < len(self._search) and self._search[i][0].startswith(word):
+                rows.add(self._search[i][1])
+                i += 1
+            matches = rows if matches is None else matches & rows
+        return matches
+
+    def assigned_to(self, officer):
+        return self.by_officer.get(officer.strip().lower(), [])
+
+    def scheduled_from(self, day):
+        """Members with a visit on or after `day`, in date order."""
+        start = bisect.bisect_left(self._dates, day)
+        return [member for d in self._dates[start:] for member in self.by_date[d]]
+
+    def attendees(self, member):
+        return [name for name, going in zip(self.rsvp_names, member.rsvps) if going]
+
+# --- TABS ---
+def month_tabs(available_tabs):
+    """Month tabs to offer: everything except the hidden tabs and any "Archive..." tab."""
+    return [t for t in available_tabs if t not in HIDDEN_TABS and not t.startswith("Archive")]
+
+
+def archive_tab_names(available_tabs):
+    return [t for t in available_tabs if t.startswith("Archive")]
+
+
+def pick_initial_tab(month_list, now=None):
+    """The current month's tab, else next month's, else the first month tab (or None)."""
+    now = now or datetime.datetime.now()
+    current_month = now.strftime("%B")            # e.g., "February"
+    next_month = (now.replace(day=28) + datetime.timedelta(days=4)).strftime("%B") # e.g., "March"
+
+    if current_month in month_list:
+        return current_month
+    if next_month in month_list:
+        return next_month
+    # Fallback to the first non-hidden, non-archived tab
+    return month_list[0] if month_list else None
+
+
+def previous_month_tab(tab_name, available_tabs):
+    """The tab for the month before `tab_name` ("March" -> "February"), checking the
+    month tabs first and then any archive tab named after that month."""
+    try:
+        month = datetime.datetime.strptime(tab_name, "%B")
+    except ValueError:
+        return None
+    previous = (month.replace(day=1) - datetime.timedelta(days=1)).strftime("%B")
+    if previous in month_tabs(available_tabs):
+        return previous
+    archived = [t for t in archive_tab_names(available_tabs) if previous.lower() in t.lower()]
+    return archived[-1] if archived else None
+
+
+# --- GOOGLE SHEETS ---
+def authorize_sheets(creds_info):
+    """gspread client for a service-account info dict (as stored in secrets)."""
+    scopes = [
+        "https://www.googleapis.com/auth/spreadsheets",
+        "https://www.googleapis.com/auth/drive"
+    ]
+
+    creds_info = dict(creds_info)
+    # Ensure the private key handles newlines correctly regardless of TOML format
+    if "private_key" in creds_info:
+        creds_info["private_key"] = creds_info["private_key"].replace("\\n", "\n")
+
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    creds = Credentials.from_service_account_info(creds_info, scopes=scopes)
+    return gspread.authorize(creds)
+
+
+class TokenBucket:
+    """Blocks callers so no more than `per_minute` requests start in any minute."""
+
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.rate = per_minute / 60.0
+        self._tokens = float(per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class SheetsGateway:
+    """The only path from the app to Google Sheets.
+
+    Every call is throttled by a token bucket sized to the Sheets per-user
+    quotas (60 reads and 60 writes per minute), retried with exponential
+    backoff and full jitter on 429/5xx and connection errors, and counted per
+    operation. Identical reads issued while one is already in flight (several
+    sessions loading the same tab) share that one request.
+
+    Spreadsheet/Worksheet handles are opened once and reused. `client` may be a
+    gspread Client or a zero-argument function returning one; a function is only
+    called on the first Sheets request, so authorizing (and importing gspread)
+    stays off the startup path.
+    """
+
+    RETRY_STATUS = {429, 500, 502, 503, 504}
+
+    def __init__(self, client, spreadsheet_id, reads_per_minute=60, writes_per_minute=60,
+                 drive_per_minute=600, max_retries=5, base_delay=1.0, max_delay=32.0):
+        self.client = client if hasattr(client, "open_by_key") else None
+        self._client_factory = None if self.client else client
+        self.spreadsheet_id = spreadsheet_id
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {
+            "read": TokenBucket(reads_per_minute),
+            "write": TokenBucket(writes_per_minute),
+            "drive": TokenBucket(drive_per_minute),
+        }
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._spreadsheet = None
+        self._worksheets = None
+        self._stats = {}
+
+    # -- Plumbing --
+
+    def _is_retryable(self, error):
+        import gspread
+        import requests
+
+        if isinstance(error, gspread.exceptions.APIError):
+            return error.response.status_code in self.RETRY_STATUS
+        return isinstance(error, (requests.ConnectionError, requests.Timeout))
+
+    def _record(self, op, latency, size=0, error=False, retries=0):
+        with self._lock:
+            stat = self._stats.setdefault(op, {
+                "calls": 0, "errors": 0, "retries": 0, "bytes": 0, "total_s": 0.0, "max_s": 0.0,
+            })
+            stat["calls"] += 1
+            stat["errors"] += int(error)
+            stat["retries"] += retries
+            stat["bytes"] += size
+            stat["total_s"] += latency
+            stat["max_s"] = max(stat["max_s"], latency)
+
+    def _call(self, op, kind, fn, size_of=None):
+        retries = 0
+        while True:
+            waited = time.perf_counter()
+            self._buckets[kind].acquire()
+            start = time.perf_counter()
+            if start - waited > 0.001:
+                metrics.record(f"sheets.throttle.{kind}", start - waited)
+            try:
+                result = fn()
+            except Exception as e:
+                metrics.record(f"sheets.{op}", time.perf_counter() - start, error=type(e).__name__)
+                if retries >= self.max_retries or not self._is_retryable(e):
+                    self._record(op, time.perf_counter() - start, error=True, retries=retries)
+                    raise
+                retries += 1
+                metrics.count("sheets.retries")
+                delay = min(self.max_delay, self.base_delay * 2 ** retries)
+                time.sleep(random.uniform(0, delay))
+                continue
+            size = size_of(result) if size_of else 0
+            self._record(op, time.perf_counter() - start, size, retries=retries)
+            metrics.record(f"sheets.{op}", time.perf_counter() - start, bytes=size)
+            return result
+
+    def _coalesced(self, key, fn):
+        """Runs fn once per key at a time; concurrent callers wait for and share its result."""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        if not owner:
+            return future.result()
+        try:
+            result = fn()
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            return {op: dict(stat) for op, stat in self._stats.items()}
+
+    # -- Handles --
+
+    def spreadsheet(self):
+        if self._spreadsheet is None:
+            self._spreadsheet = self._coalesced(("open",), self._open)
+        return self._spreadsheet
+
+    def _open(self):
+        if self.client is None:
+            with metrics.span("sheets.authorize"):
+                self.client = self._client_factory()
+        return self._call("open_by_key", "read", lambda: self.client.open_by_key(self.spreadsheet_id))
+
+    def worksheets(self, refresh=False):
+        """{tab name: Worksheet} from a single metadata call."""
+        if self._worksheets is None or refresh:
+            sheets = self._coalesced(("worksheets",), lambda: self._call(
+                "worksheets", "read", self.spreadsheet().worksheets))
+            self._worksheets = {sh.title: sh for sh in sheets}
+        return self._worksheets
+
+    def worksheet(self, tab_name):
+        sheet = self.worksheets().get(tab_name)
+        if sheet is None:
+            # Tab added after the handles were cached
+            sheet = self.worksheets(refresh=True).get(tab_name)
+            if sheet is None:
+                import gspread
+                raise gspread.exceptions.WorksheetNotFound(tab_name)
+        return sheet
+
+    # -- Operations --
+
+    def get_all_values(self, tab_name):
+        sheet = self.worksheet(tab_name)
+        return self._coalesced(("get_all_values", tab_name), lambda: self._call(
+            "get_all_values", "read", sheet.get_all_values, size_of=_values_size))
+
+    def batch_get(self, tab_name, ranges):
+        sheet = self.worksheet(tab_name)
+        return self._coalesced(("batch_get", tab_name, tuple(ranges)), lambda: self._call(
+            "batch_get", "read", lambda: sheet.batch_get(ranges),
+            size_of=lambda result: sum(_values_size(values) for values in result)))
+
+    def modified_time(self):
+        # Drive API call: counted against the Drive quota, not the Sheets read quota
+        spreadsheet = self.spreadsheet()
+        return self._coalesced(("modified_time",), lambda: self._call(
+            "modified_time", "drive", spreadsheet.get_lastUpdateTime))
+
+    def batch_update(self, tab_name, data):
+        sheet = self.worksheet(tab_name)
+        size = sum(_values_size(item["values"]) for item in data)
+        return self._call("batch_update", "write", lambda: sheet.batch_update(
+            data, value_input_option="USER_ENTERED"),  # Same parsing as update_acell (dates, TRUE)
+            size_of=lambda _: size)
+
+
+def _values_size(values):
+    """Approximate payload size of a 2-D list of cell strings."""
+    return sum(len(str(cell)) for row in values for cell in row)
+
+
+class SheetLoader:
+    """Reads month tabs from Google Sheets.
+
+    Besides full downloads it can re-pull only the columns that change during a
+    month (G officer, H-I attempts, J-K schedule, L-S RSVPs, U last visited) and
+    merge them into rows we already have. Column A is fetched alongside as a
+    cheap check that no member rows were added, removed or reordered.
+    """
+
+    CHANGING_RANGES = ((6, 18), (20, 20))  # 0-based inclusive column spans: G-S and U
+
+    def __init__(self, gateway):
+        self.gateway = gateway
+
+    def fetch(self, tab_name):
+        return self.gateway.get_all_values(tab_name)
+
+    def modified_time(self):
+        """Drive modifiedTime of the whole spreadsheet; unchanged means nothing to re-read."""
+        return self.gateway.modified_time()
+
+    def refresh(self, tab_name, rows):
+        """Returns `rows` with the changing columns re-read, or None if the row layout moved."""
+        first = HEADER_ROWS + 1
+        ranges = [f"A{first}:A"] + [
+            f"{column_letter(start)}{first}:{column_letter(end)}" for start, end in self.CHANGING_RANGES
+        ]
+        names_col, *changed = self.gateway.batch_get(tab_name, ranges)
+
+        cached_names = [_cell(row, 0) for row in rows[HEADER_ROWS:]]
+        fresh_names = [_cell(row, 0) for row in names_col]
+        while cached_names and not cached_names[-1]:
+            cached_names.pop()
+        while fresh_names and not fresh_names[-1]:
+            fresh_names.pop()
+        if cached_names != fresh_names:
+            return None
+
+        merged = list(rows[:HEADER_ROWS])
+        width = max(end for _, end in self.CHANGING_RANGES) + 1
+        for i, row in enumerate(rows[HEADER_ROWS:]):
+            row = list(row)
+            if len(row) < width:
+                row.extend([""] * (width - len(row)))
+            for (start, end), values in zip(self.CHANGING_RANGES, changed):
+                fresh = values[i] if i < len(values) else []
+                for col in range(start, end + 1):
+                    row[col] = _cell(fresh, col - start)
+            merged.append(row)
+        return merged
+
+
+def column_letter(idx):
+    """0-based column index to its A1 letter (6 -> "G")."""
+    import gspread.utils
+    return gspread.utils.rowcol_to_a1(1, idx + 1)[:-1]
+
+
+class SnapshotStore:
+    """Last known tab list and tab values, kept on disk (SQLite) across restarts.
+
+    Lets a cold start render straight away instead of waiting on Google auth and
+    the Sheets API, and gives us something to show when the API is unavailable.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tab_names (id INTEGER PRIMARY KEY CHECK (id = 1), names TEXT, saved_at REAL)"
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS tab_rows (tab TEXT PRIMARY KEY, rows TEXT, modified TEXT, saved_at REAL)"
+            )
+
+    def load_tab_names(self):
+        with self._lock:
+            row = self._db.execute("SELECT names FROM tab_names WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_tab_names(self, names):
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tab_names (id, names, saved_at) VALUES (1, ?, ?)",
+                (json.dumps(names), time.time()),
+            )
+
+    def load_rows(self, tab_name):
+        """Returns (rows, modified, saved_at) or None."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT rows, modified, saved_at FROM tab_rows WHERE tab = ?", (tab_name,)
+            ).fetchone()
+        if row is None:
+            return None
+        return json.loads(row[0]), row[1], row[2]
+
+    def save_rows(self, tab_name, rows, modified):
+        payload = json.dumps(rows)
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO tab_rows (tab, rows, modified, saved_at) VALUES (?, ?, ?, ?)",
+                (tab_name, payload, modified, time.time()),
+            )
+
+
+def _same_rows(a, b):
+    """True if two tab value grids match, ignoring trailing blank cells and rows
+    (a column refresh pads rows that a full download leaves short)."""
+    def trimmed(rows):
+        out = []
+        for row in rows:
+            row = list(row)
+            while row and not row[-1]:
+                row.pop()
+            out.append(row)
+        while out and not out[-1]:
+            out.pop()
+        return out
+    return trimmed(a) == trimmed(b)
+
+
+class TabCache:
+    """Process-wide cache of tab values, versioned per tab.
+
+    Writes patch the cached rows in place of a reload, so a click costs one API
+    call and leaves every other tab (and every other session's view) cached.
+    Every `ttl` seconds a tab is revalidated: first against the spreadsheet's
+    modifiedTime, then (only if something changed) by re-reading the changing
+    columns. A full download happens on first use and every `full_ttl` seconds.
+    modifiedTime covers the whole workbook, so a tab only gets a new version when
+    its re-read rows actually differ from the cached ones.
+
+    Revalidation is stale-while-revalidate: once a tab has data (in memory or
+    from the on-disk snapshot) readers get it immediately and the refresh runs
+    on a background thread. If the refresh fails (quota, timeouts) the last good
+    copy keeps being served until the next attempt.
+
+    There is one copy per tab for the whole process, so every session reads the
+    same rows and the API cost follows the number of changes, not sessions x
+    reruns. Sessions notice changes made by others by comparing `version()`.
+    """
+
+    def __init__(self, loader, snapshots=None, ttl=60, full_ttl=1800):
+        self.loader = loader
+        self.snapshots = snapshots
+        self.ttl = ttl
+        self.full_ttl = full_ttl
+        self._lock = threading.Lock()
+        self._entries = {}  # tab -> {"rows", "version", "fetched_at", "checked_at", "modified", "roster"}
+        self._refreshing = set()
+        self._pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tab-load")
+
+    def _store(self, tab_name, rows, modified, fetched_at=None, checked_at=None, persist=True, base_version=None):
+        now = time.monotonic()
+        with self._lock:
+            old = self._entries.get(tab_name)
+            if old and base_version is not None and old["version"] != base_version:
+                # A write was patched in while these rows were being read; they may
+                # predate it, so keep the patched copy and re-check on the next read
+                old["checked_at"] = float("-inf")
+                return old
+            if old and _same_rows(old["rows"], rows):
+                # Something else in the workbook changed: keep the version (and the
+                # built roster) so readers and other sessions see no change
+                old["modified"] = modified
+                old["fetched_at"] = now if fetched_at is None else fetched_at
+                old["checked_at"] = now if checked_at is None else checked_at
+                return old
+            entry = {
+                "rows": rows,
+                "version": (old["version"] + 1) if old else 1,
+                "fetched_at": now if fetched_at is None else fetched_at,
+                "checked_at": now if checked_at is None else checked_at,
+                "modified": modified,
+                "roster": None,
+            }
+            self._entries[tab_name] = entry
+        if persist and self.snapshots:
+            self.snapshots.save_rows(tab_name, rows, modified)
+        return entry
+
+    def _load_snapshot(self, tab_name):
+        snapshot = self.snapshots.load_rows(tab_name) if self.snapshots else None
+        if snapshot is None:
+            return None
+        rows, modified, saved_at = snapshot
+        # Age the entry by the snapshot's age so the TTLs still apply, and force a revalidation
+        fetched_at = time.monotonic() - (time.time() - saved_at)
+        return self._store(tab_name, rows, modified, fetched_at=fetched_at,
+                           checked_at=float("-inf"), persist=False)
+
+    def get(self, tab_name):
+        with self._lock:
+            entry = self._entries.get(tab_name)
+        if entry is None:
+            entry = self._load_snapshot(tab_name)
+            if entry is not None:
+                metrics.count("tab_cache.snapshot")
+        if entry is None:
+            # Nothing to show yet: this first load has to block
+            metrics.count("tab_cache.miss")
+            with metrics.span("tab_cache.load", tab=tab_name):
+                return self._revalidate(tab_name)
+        if time.monotonic() - entry["checked_at"] >= self.ttl:
+            metrics.count("tab_cache.stale")
+            self._revalidate_in_background(tab_name)
+        else:
+            metrics.count("tab_cache.hit")
+        return entry
+
+    def revalidate_stale(self, tab_names):
+        """Starts a background revalidation for each of `tab_names` that is cached
+        and past its TTL. Never loads or blocks: tabs not cached yet are skipped."""
+        now = time.monotonic()
+        with self._lock:
+            stale = [tab_name for tab_name in tab_names
+                     if tab_name in self._entries and now - self._entries[tab_name]["checked_at"] >= self.ttl]
+        for tab_name in stale:
+            metrics.count("tab_cache.stale")
+            self._revalidate_in_background(tab_name)
+
+    def _revalidate_in_background(self, tab_name):
+        with self._lock:
+            if tab_name in self._refreshing:
+                return
+            self._refreshing.add(tab_name)
+
+        def run():
+            try:
+                self._revalidate(tab_name)
+            except Exception:
+                logger.warning("Background refresh of %r failed", tab_name, exc_info=True)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(tab_name)
+
+        threading.Thread(target=run, name=f"refresh-{tab_name}", daemon=True).start()
+
+    def _revalidate(self, tab_name):
+        with self._lock:
+            entry = self._entries.get(tab_name)
+        base_version = entry["version"] if entry else 0
+        now = time.monotonic()
+        try:
+            modified = self.loader.modified_time()
+            if entry and now - entry["fetched_at"] < self.full_ttl:
+                if modified == entry["modified"]:
+                    entry["checked_at"] = now
+                    return entry
+                rows = self.loader.refresh(tab_name, entry["rows"])
+                if rows is not None:
+                    return self._store(tab_name, rows, modified, fetched_at=entry["fetched_at"],
+                                       base_version=base_version)
+            return self._store(tab_name, self.loader.fetch(tab_name), modified, base_version=base_version)
+        except Exception:
+            if entry is None:
+                raise
+            # Keep serving the last good copy; try again after another ttl
+            entry["checked_at"] = now
+            logger.warning("Refresh of %r failed; serving cached data", tab_name, exc_info=True)
+            return entry
+
+    def roster(self, tab_name):
+        entry = self.get(tab_name)
+        if entry["roster"] is None:
+            # Built at most once per version; concurrent builders produce equal rosters
+            with metrics.span("roster.build", tab=tab_name):
+                entry["roster"] = Roster(entry["rows"], entry["version"])
+        return entry["roster"]
+
+    def rosters(self, tab_names):
+        """Loads several tabs at once on a bounded pool; tabs already cached return
+        straight away, so only missing ones cost an API call.
+
+        Returns ({tab: Roster}, {tab: error}) so one bad tab doesn't hide the rest.
+        """
+        futures = {tab_name: self._pool.submit(self.roster, tab_name) for tab_name in tab_names}
+        rosters, errors = {}, {}
+        for tab_name, future in futures.items():
+            try:
+                rosters[tab_name] = future.result()
+            except Exception as e:
+                errors[tab_name] = e
+        return rosters, errors
+
+    def version(self, tab_name):
+        with self._lock:
+            entry = self._entries.get(tab_name)
+            return entry["version"] if entry else 0
+
+    def versions(self, tab_names):
+        """{tab: version} for the given tabs, read under one lock."""
+        with self._lock:
+            return {
+                tab_name: self._entries[tab_name]["version"] if tab_name in self._entries else 0
+                for tab_name in tab_names
+            }
+
+    def patch(self, tab_name, cells):
+        """Applies {"G12": "Ana", ...} to the cached rows and bumps the tab version,
+        returning the new version (None if the tab isn't cached).
+
+        Rows are copied before patching so readers holding the previous version
+        never see a half-applied write.
+        """
+        import gspread.utils
+
+        with self._lock:
+            entry = self._entries.get(tab_name)
+            if entry is None:
+                return
+            rows = list(entry["rows"])
+            for a1, value in cells.items():
+                row_num, col_num = gspread.utils.a1_to_rowcol(a1)
+                while len(rows) < row_num:
+                    rows.append([])
+                row = list(rows[row_num - 1])
+                if len(row) < col_num:
+                    row.extend([""] * (col_num - len(row)))
+                row[col_num - 1] = value
+                rows[row_num - 1] = row
+            version = entry["version"] + 1
+            self._entries[tab_name] = dict(entry, rows=rows, version=version, roster=None)
+        if self.snapshots:
+            self.snapshots.save_rows(tab_name, rows, entry["modified"])
+        return version
+
+
+# --- VISIT HISTORY (ARCHIVE TABS) ---
+def member_key(first_name, last_name):
+    """Normalised "first last" used to match a member across tabs."""
+    return " ".join(f"{first_name} {last_name}".lower().split())
+
+
+class ArchiveIndex:
+    """Per-member visit history built from the "Archive ..." tabs, kept on disk.
+
+    Archived tabs never change, so each one is downloaded exactly once and
+    recorded in SQLite; after that, history lookups are local queries with no
+    TTL and no API calls. New archive tabs are picked up the next time
+    `ensure()` sees them in the tab list.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        with self._lock, self._db:
+            self._db.execute("CREATE TABLE IF NOT EXISTS archive_tabs (tab TEXT PRIMARY KEY, indexed_at REAL)")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS visits ("
+                " member_key TEXT, tab TEXT, officer TEXT, try_1 INTEGER,"
+                " try_2 INTEGER, visit_date TEXT, visit_time TEXT, last_visited TEXT)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS visits_member ON visits (member_key)")
+
+    def indexed_tabs(self):
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT tab FROM archive_tabs")}
+
+    def ensure(self, archive_tabs, gateway):
+        """Indexes any archive tab not seen before; returns {tab: error} for tabs that failed."""
+        with self._build_lock:
+            missing = [tab for tab in archive_tabs if tab not in self.indexed_tabs()]
+            if not missing:
+                return {}
+            errors = {}
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix="archive-index") as pool:
+                futures = {tab: pool.submit(gateway.get_all_values, tab) for tab in missing}
+                for tab, future in futures.items():
+                    try:
+                        self._add_tab(tab, future.result())
+                    except Exception as e:
+                        errors[tab] = e
+            return errors
+
+    def _add_tab(self, tab_name, rows):
+        records = [
+            (member_key(m.first_name, m.last_name), tab_name, m.officer, int(m.try_1),
+             int(m.try_2), m.visit_date_str, m.visit_time, m.last_visited)
+            for m in Roster(rows).members
+            if m.first_name or m.last_name
+        ]
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM visits WHERE tab = ?", (tab_name,))
+            self._db.executemany(
+                "INSERT INTO visits (member_key, tab, officer, try_1, try_2, visit_date, visit_time, last_visited)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                records,
+            )
+            self._db.execute("INSERT OR REPLACE INTO archive_tabs VALUES (?, ?)", (tab_name, time.time()))
+
+    def officers(self, tab_name):
+        """{member key: officer} for one indexed archive tab, in the same form as
+        previous_officers() gives for a live month tab."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT member_key, officer FROM visits WHERE tab = ? AND officer != ''", (tab_name,)
+            ).fetchall()
+        return {key: officer.lower() for key, officer in rows}
+
+    def history(self, first_name, last_name, archive_tabs=()):
+        """Archived months for one member, as dicts, in the order of `archive_tabs`
+        (the workbook's current archive tabs); tabs no longer listed go last."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT tab, officer, try_1, try_2, visit_date, visit_time, last_visited"
+                " FROM visits WHERE member_key = ?",
+                (member_key(first_name, last_name),),
+            ).fetchall()
+        # Ordered here rather than when indexing: tabs get reordered, added and
+        # removed, but an indexed tab is never downloaded again
+        order = {tab: i for i, tab in enumerate(archive_tabs)}
+        rows.sort(key=lambda row: (order.get(row[0], len(order)), row[0]))
+        return [
+            {"tab": tab, "officer": officer, "attempts": try_1 + try_2, "visit_date": visit_date,
+             "visit_time": visit_time, "last_visited": last_visited}
+            for tab, officer, try_1, try_2, visit_date, visit_time, last_visited in rows
+        ]
+
+
+# --- AUTO-ASSIGN ---
+def previous_officers(roster):
+    """{member key: officer} for a month's roster, to avoid repeating last month's pairing."""
+    return {member_key(m.first_name, m.last_name): m.officer.lower() for m in roster.members if m.officer}
+
+
+def propose_assignments(members, officers, previous=None):
+    """Balanced officer for every member without one (column G blank).
+
+    Greedy least-loaded: officers sit in a heap keyed on how many of `members`
+    they already have, each unassigned member goes to the lightest officer
+    other than the one who had them last month, and that officer's load goes up
+    by one. O(n log k) for n members and k officers, so thousands of rows are
+    instant. Returns [(member, officer)] in member order.
+    """
+    if not officers:
+        return []
+    previous = previous or {}
+    wanted = {name.lower(): name for name in officers}
+    loads = dict.fromkeys(officers, 0)
+    for member in members:
+        name = wanted.get(member.officer.lower())
+        if name:
+            loads[name] += 1
+    # Ties go to the officer listed first
+    heap = [(loads[name], order, name) for order, name in enumerate(officers)]
+    heapq.heapify(heap)
+
+    proposal = []
+    for member in members:
+        if member.officer:
+            continue
+        entry = heapq.heappop(heap)
+        avoid = previous.get(member_key(member.first_name, member.last_name))
+        if entry[2].lower() == avoid and heap:
+            entry = heapq.heapreplace(heap, entry)
+        load, order, name = entry
+        proposal.append((member, name))
+        heapq.heappush(heap, (load + 1, order, name))
+    return proposal
+
+
+# --- NOTIFICATIONS ---
+class RateLimiter:
+    """Hands out send slots that respect Telegram's limits.
+
+    Telegram allows roughly 30 messages per second per bot and about one message
+    per second to the same chat. Slots are reserved under the lock and slept on
+    outside it, so concurrent senders queue up fairly instead of bursting.
+    """
+
+    def __init__(self, global_per_second=25, per_chat_interval=1.0):
+        self.global_interval = 1.0 / global_per_second
+        self.per_chat_interval = per_chat_interval
+        self._lock = threading.Lock()
+        self._next_global = 0.0
+        self._next_chat = {}
+
+    def wait(self, chat_id):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_global, self._next_chat.get(chat_id, 0.0))
+            self._next_global = slot + self.global_interval
+            self._next_chat[chat_id] = slot + self.per_chat_interval
+        if slot > now:
+            time.sleep(slot - now)
+
+    def pause(self, chat_id, seconds):
+        """Pushes back every send after a 429 (flood limits are per bot)."""
+        with self._lock:
+            until = time.monotonic() + seconds
+            self._next_global = max(self._next_global, until)
+            self._next_chat[chat_id] = max(self._next_chat.get(chat_id, 0.0), until)
+
+
+class DeliveryResult:
+    """Outcome of one Telegram message, for the per-recipient report."""
+    __slots__ = ("recipient", "chat_id", "ok", "attempts", "error")
+
+    def __init__(self, recipient, chat_id, ok, attempts, error=None):
+        self.recipient = recipient
+        self.chat_id = chat_id
+        self.ok = ok
+        self.attempts = attempts
+        self.error = error
+
+
+class TelegramDispatcher:
+    """Sends Telegram messages over a pooled session from a bounded thread pool."""
+
+    def __init__(self, token, max_workers=8, timeout=(3.05, 10), max_retries=3, limiter=None):
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.limiter = limiter or RateLimiter()
+        self.max_workers = max_workers
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="telegram")
+
+    @property
+    def session(self):
+        """Pooled HTTP session, created (and requests imported) on the first send."""
+        with self._session_lock:
+            if self._session is None:
+                import requests
+                import requests.adapters
+
+                self._session = requests.Session()
+                self._session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers))
+            return self._session
+
+    def send(self, chat_id, message, recipient=None):
+        import requests
+
+        payload = {"chat_id": chat_id, "text": message, "parse_mode": "Markdown"}
+        error = None
+        for attempt in range(1, self.max_retries + 2):
+            self.limiter.wait(chat_id)
+            try:
+                with metrics.span("telegram.sendMessage"):
+                    resp = self.session.post(self.url, json=payload, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = str(e)
+                time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+                continue
+
+            if resp.status_code == 429:
+                try:
+                    retry_after = resp.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = 1
+                error = f"Rate limited (retry after {retry_after}s)"
+                self.limiter.pause(chat_id, retry_after)
+                continue
+            if resp.status_code >= 500:
+                error = f"Telegram server error {resp.status_code}"
+                time.sleep(min(2 ** attempt, 30) * random.uniform(0.5, 1.0))
+                continue
+            if resp.status_code != 200:
+                # 400/403 (bad chat id, bot blocked, ...) will not succeed on retry
+                try:
+                    error = resp.json().get("description", f"HTTP {resp.status_code}")
+                except ValueError:
+                    error = f"HTTP {resp.status_code}"
+                return DeliveryResult(recipient, chat_id, False, attempt, error)
+            return DeliveryResult(recipient, chat_id, True, attempt)
+        return DeliveryResult(recipient, chat_id, False, self.max_retries + 1, error)
+
+    def broadcast(self, messages):
+        """Sends [(recipient, chat_id, message), ...] concurrently; results keep input order."""
+        futures = [
+            self._executor.submit(self.send, chat_id, message, recipient)
+            for recipient, chat_id, message in messages
+        ]
+        return [future.result() for future in futures]
+
+
+class NotificationQueue:
+    """Background Telegram sender backed by an on-disk SQLite queue.
+
+    Messages are written to disk before the UI returns and delivered by a
+    worker thread, so a click never waits on Telegram and anything still queued
+    when the app restarts is sent on the next start.
+    """
+
+    def __init__(self, path, dispatcher, batch_size=50):
+        self.dispatcher = dispatcher
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        with self._lock, self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS notifications ("
+                " id INTEGER PRIMARY KEY, batch TEXT, recipient TEXT, chat_id TEXT,"
+                " message TEXT, status TEXT, attempts INTEGER DEFAULT 0, error TEXT,"
+                " created REAL, updated REAL)"
+            )
+            # Keep a week of history for the status display
+            self._db.execute(
+                "DELETE FROM notifications WHERE status != 'queued' AND updated < ?",
+                (time.time() - 7 * 86400,),
+            )
+        self._worker = threading.Thread(target=self._run, name="notification-queue", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, messages):
+        """Queues [(recipient, chat_id, message), ...] and returns the batch id."""
+        batch = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT INTO notifications (batch, recipient, chat_id, message, status, created, updated)"
+                " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+                [(batch, recipient, str(chat_id), message, now, now) for recipient, chat_id, message in messages],
+            )
+        self._wake.set()
+        return batch
+
+    def status(self, batch):
+        """Returns ({"queued": n, "sent": n, "failed": n}, [(recipient, error), ...])."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT recipient, status, error FROM notifications WHERE batch = ?", (batch,)
+            ).fetchall()
+        counts = {"queued": 0, "sent": 0, "failed": 0}
+        failures = []
+        for recipient, status, error in rows:
+            counts[status] += 1
+            if status == "failed":
+                failures.append((recipient, error))
+        return counts, failures
+
+    def _next_batch(self):
+        with self._lock:
+            return self._db.execute(
+                "SELECT id, recipient, chat_id, message FROM notifications"
+                " WHERE status = 'queued' ORDER BY id LIMIT ?",
+                (self.batch_size,),
+            ).fetchall()
+
+    def _run(self):
+        while True:
+            try:
+                self._run_once()
+            except Exception:
+                # Keep the worker alive: anything still queued is retried after a pause
+                logger.exception("Notification worker failed; retrying shortly")
+                time.sleep(5)
+
+    def _run_once(self):
+        pending = self._next_batch()
+        if not pending:
+            self._wake.wait(timeout=30)
+            self._wake.clear()
+            return
+        with metrics.span("telegram.batch", messages=len(pending)):
+            results = self.dispatcher.broadcast(
+                (recipient, chat_id, message) for _, recipient, chat_id, message in pending
+            )
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE notifications SET status = ?, attempts = attempts + ?, error = ?, updated = ?"
+                " WHERE id = ?",
+                [
+                    ("sent" if r.ok else "failed", r.attempts, r.error, now, row[0])
+                    for row, r in zip(pending, results)
+                ],
+            )
+
+
+# --- MESSAGES ---
+def assignment_message(tab_name):
+    return (
+        f"📋 **{tab_name} Visitation Assignments Have Been Made**\n\n"
+        f"To see your assignments, [click here]({APP_URL})"
+    )
+
+
+def schedule_message(full_name, date_str, time_str):
+    return (
+        f"📅 **New Visitation Scheduled!**\n\n"
+        f"A visitation has been scheduled for **{full_name}** on {date_str} at {time_str}.\n\n"
+        f"Please click the link below to let everyone know if you can attend:\n"
+        f"{APP_URL}"
+    )
+
+
+def assignment_summary(members, officer_map):
+    """{officer: [member names]} for active members whose officer has a Telegram chat."""
+    summary = {}
+    for member in members:
+        off = member.officer.title()
+        if off in officer_map:
+            summary.setdefault(off, []).append(member.full_name)
+    return summary
+
+
+def upcoming_visits(rosters, start, days):
+    """[(date, tab, roster, member)] for visits from `start` through `start + days`, by date."""
+    end = start + datetime.timedelta(days=days)
+    visits = []
+    for tab_name, roster in rosters.items():
+        for member in roster.scheduled_from(start):
+            if member.visit_date > end:
+                break
+            visits.append((member.visit_date, tab_name, roster, member))
+    visits.sort(key=lambda visit: visit[0])
+    return visits
+
+
+def reminder_messages(visits, officer_map):
+    """One reminder per officer covering the visits they're assigned to or attending."""
+    per_officer = {}
+    for visit_date, tab_name, roster, member in visits:
+        people = {member.officer.title()} | {name.title() for name in roster.attendees(member)}
+        line = f"• **{member.full_name}**: {member.visit_date_str} at {member.visit_time or 'TBD'}"
+        if member.address:
+            line += f" ({member.address})"
+        for off in people:
+            if off in officer_map:
+                per_officer.setdefault(off, []).append(line)
+    return [
+        (off, officer_map[off], "⏰ **Upcoming Visitations**\n\n" + "\n".join(lines) + f"\n\n{APP_URL}")
+        for off, lines in per_officer.items()
+    ]
+